@@ -1,20 +1,21 @@
 """itkwidgets: an elegant Python interface for visualization on the web platform
 to interactively generate insights into multidimensional images, point sets, and geometry."""
-from .integrations.environment import ENVIRONMENT, Env
-
-if ENVIRONMENT is not Env.HYPHA:
-    from imjoy_rpc import register_default_codecs
-    register_default_codecs()
-
-    from .imjoy import register_itkwasm_imjoy_codecs
-    register_itkwasm_imjoy_codecs()
-
-from .viewer import Viewer, view, compare_images
-from .standalone_server import standalone_viewer
+# The imjoy codecs are registered when the first viewer is created
+from .viewer import AsyncViewer, Viewer, view, compare_images
 
 __all__ = [
+  "AsyncViewer",
   "Viewer",
   "view",
   "compare_images",
   "standalone_viewer",
 ]
+
+
+def __getattr__(name):
+    # The standalone server depends on hypha and the ngff_zarr CLI, which are
+    # only imported when it is used
+    if name == "standalone_viewer":
+        from .standalone_server import standalone_viewer
+        return standalone_viewer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,158 @@
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, MutableMapping, Tuple
+
+from .config import config
+
+
+def _cacheable(store: MutableMapping) -> bool:
+    # Chunks that are already held in memory are not worth a second copy
+    import zarr
+    if isinstance(store, zarr.storage.MemoryStore) or getattr(store, 'in_memory', False):
+        return False
+    try:
+        # Cached chunks are dropped when their store is garbage collected
+        weakref.ref(store)
+    except TypeError:
+        return False
+    return True
+
+
+class ChunkCache:
+    """Least recently used cache of chunks read from the stores served to
+    viewers, bounded by bytes.
+
+    Concurrent requests for the same chunk are coalesced: the first request
+    reads the chunk from the store and the others wait for its result, so
+    each chunk is read or computed at most once while it is cached.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: 'OrderedDict[Tuple[int, str], bytes]' = OrderedDict()
+        self._nbytes = 0
+        self._in_flight: Dict[Tuple[int, str], Future] = {}
+        self._stores = set()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes held by the cached chunks.
+
+        :return: Size of the cached chunks in bytes
+        :rtype:  int
+        """
+        return self._nbytes
+
+    def stats(self) -> Dict[str, int]:
+        """Cache statistics.
+
+        :return: Number of hits, misses, coalesced requests, cached chunks
+        and cached bytes
+        :rtype:  Dict[str, int]
+        """
+        with self._lock:
+            return dict(self._stats, chunks=len(self._chunks), nbytes=self._nbytes)
+
+    def _track(self, store: MutableMapping) -> None:
+        store_id = id(store)
+        if store_id in self._stores:
+            return
+        self._stores.add(store_id)
+        # Drop the chunks of a store once it is garbage collected, before its
+        # id can be re-used
+        weakref.finalize(store, self._discard_store, store_id)
+
+    def _discard_store(self, store_id: int) -> None:
+        with self._lock:
+            self._stores.discard(store_id)
+            for cache_key in [k for k in self._chunks if k[0] == store_id]:
+                self._nbytes -= len(self._chunks.pop(cache_key))
+
+    def _put(self, cache_key: Tuple[int, str], value: bytes) -> None:
+        max_bytes = config.chunk_cache_max_bytes
+        if len(value) > max_bytes:
+            return
+        self._chunks[cache_key] = value
+        self._nbytes += len(value)
+        while self._nbytes > max_bytes:
+            _, evicted = self._chunks.popitem(last=False)
+            self._nbytes -= len(evicted)
+
+    def get(self, store: MutableMapping, key: str) -> bytes:
+        """Read a chunk through the cache.
+
+        :param store: The store to read from on a miss
+        :type store:  MutableMapping
+        :param key: The chunk or metadata key
+        :type key:  str
+        :return: The stored value
+        :rtype:  bytes
+        :raises KeyError: if the key is not in the store
+        """
+        if not _cacheable(store):
+            return store[key]
+        cache_key = (id(store), key)
+        with self._lock:
+            value = self._chunks.get(cache_key)
+            if value is not None:
+                self._chunks.move_to_end(cache_key)
+                self._stats['hits'] += 1
+                return value
+            future = self._in_flight.get(cache_key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[cache_key] = future
+                self._track(store)
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            value = store[key]
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[cache_key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._in_flight[cache_key]
+            self._put(cache_key, value)
+        future.set_result(value)
+        return value
+
+    def discard(self, store: MutableMapping, key: str) -> None:
+        """Remove a chunk, e.g. after it was written.
+
+        :param store: The store of the chunk
+        :type store:  MutableMapping
+        :param key: The chunk or metadata key
+        :type key:  str
+        """
+        with self._lock:
+            value = self._chunks.pop((id(store), key), None)
+            if value is not None:
+                self._nbytes -= len(value)
+
+    def discard_store(self, store: MutableMapping) -> None:
+        """Remove all the chunks of a store, e.g. when it is displayed
+        again after it may have been modified outside of itkwidgets.
+
+        :param store: The store
+        :type store:  MutableMapping
+        """
+        self._discard_store(id(store))
+
+    def clear(self) -> None:
+        """Remove all cached chunks."""
+        with self._lock:
+            self._chunks.clear()
+            self._nbytes = 0
+
+
+chunk_cache = ChunkCache()
@@ -0,0 +1,174 @@
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict
+
+from .config import config
+
+# Size of the sample compressed with each candidate codec
+_probe_bytes = 2**20
+# Data that compresses less than this is sent uncompressed
+_min_ratio = 1.15
+# zstd is only chosen over lz4 when it compresses this much better, and
+# encodes at least this many MB/s
+_zstd_min_gain = 1.25
+_zstd_min_throughput = 50.0
+# Pyramid levels up to this size are decoded most often by the viewer and
+# favor fast decoding over compression ratio
+_coarse_level_bytes = 64 * 2**20
+
+
+@lru_cache(maxsize=None)
+def _candidates() -> Dict[str, Any]:
+    from numcodecs import Blosc
+    return {
+        'lz4-shuffle': Blosc(cname='lz4', clevel=3, shuffle=Blosc.SHUFFLE),
+        'lz4-bitshuffle': Blosc(cname='lz4', clevel=3, shuffle=Blosc.BITSHUFFLE),
+        'zstd-shuffle': Blosc(cname='zstd', clevel=3, shuffle=Blosc.SHUFFLE),
+        'zstd-bitshuffle': Blosc(cname='zstd', clevel=3, shuffle=Blosc.BITSHUFFLE),
+    }
+
+
+@dataclass
+class CodecChoice:
+    """A compressor chosen for a pyramid level or an image."""
+
+    # Candidate name, e.g. 'lz4-shuffle', or 'none'
+    name: str
+    # The numcodecs compressor, None for uncompressed data
+    compressor: Any
+    # Compression ratio of the probe sample, 1.0 when it was not probed
+    probe_ratio: float = 1.0
+    # Encoding throughput on the probe sample in MB/s, 0.0 when not probed
+    probe_throughput: float = 0.0
+
+
+def _probe_sample(sample):
+    import numpy as np
+    sample = np.ascontiguousarray(sample).reshape(-1)
+    n = max(_probe_bytes // max(sample.itemsize, 1), 1)
+    # The middle of the data, as the edges are often background
+    start = max((sample.size - n) // 2, 0)
+    return sample[start:start + n]
+
+
+class CodecPolicy:
+    """Choose the transfer compressor for each pyramid level and image from
+    a quick compressibility probe, and keep statistics on the chosen codecs.
+
+    Noisy data, e.g. floating point images, that barely compresses is sent
+    uncompressed rather than paying for compression on every transfer.
+    Coarse levels, which the viewer decodes constantly, use lz4 for fast
+    decoding, while finer levels use zstd when it compresses substantially
+    better. The shuffle filter that compresses the sample best is used.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def probe(self, sample) -> Dict[str, CodecChoice]:
+        """Compress a sample of the data with each candidate codec.
+
+        :param sample: Representative data, of which up to 1 MB from the
+        middle is compressed
+        :type sample:  array_like
+        :return: The candidates with their probe ratio and throughput
+        :rtype:  Dict[str, CodecChoice]
+        """
+        sample = _probe_sample(sample)
+        results = {}
+        for name, compressor in _candidates().items():
+            start = time.perf_counter()
+            encoded = compressor.encode(sample)
+            seconds = max(time.perf_counter() - start, 1e-9)
+            results[name] = CodecChoice(
+                name, compressor, sample.nbytes / max(len(encoded), 1), sample.nbytes / seconds / 1e6
+            )
+        return results
+
+    def select(self, probe: Dict[str, CodecChoice], nbytes: int = 0) -> CodecChoice:
+        """Pick a codec from the probe results.
+
+        :param probe: Result of probe()
+        :type probe:  Dict[str, CodecChoice]
+        :param nbytes: Uncompressed size of the level or image, which
+        decides whether it is decoded often enough to favor lz4
+        :type nbytes:  int
+        :return: The chosen codec
+        :rtype:  CodecChoice
+        """
+        lz4 = max((probe[n] for n in ('lz4-shuffle', 'lz4-bitshuffle')), key=lambda c: c.probe_ratio)
+        zstd = max((probe[n] for n in ('zstd-shuffle', 'zstd-bitshuffle')), key=lambda c: c.probe_ratio)
+        if max(lz4.probe_ratio, zstd.probe_ratio) < _min_ratio:
+            return CodecChoice('none', None, 1.0, lz4.probe_throughput)
+        if (
+            nbytes > _coarse_level_bytes
+            and zstd.probe_ratio >= lz4.probe_ratio * _zstd_min_gain
+            and zstd.probe_throughput >= _zstd_min_throughput
+        ):
+            return zstd
+        return lz4
+
+    def choose(self, sample, nbytes: int = 0) -> CodecChoice:
+        """Probe the sample and pick a codec. With config.adaptive_codecs
+        disabled, the default lz4 codec is returned without probing.
+
+        :param sample: Representative data
+        :type sample:  array_like
+        :param nbytes: Uncompressed size of the level or image
+        :type nbytes:  int
+        :return: The chosen codec
+        :rtype:  CodecChoice
+        """
+        if not config.adaptive_codecs:
+            return self.default()
+        return self.select(self.probe(sample), nbytes)
+
+    def default(self) -> CodecChoice:
+        """The codec used without a probe."""
+        return CodecChoice('lz4-shuffle', _candidates()['lz4-shuffle'])
+
+    def record(self, name: str, nbytes: int, encoded_nbytes: int, seconds: float) -> None:
+        """Account for data encoded with a codec.
+
+        :param name: Name of the codec
+        :type name:  str
+        :param nbytes: Uncompressed size in bytes
+        :type nbytes:  int
+        :param encoded_nbytes: Compressed size in bytes
+        :type encoded_nbytes:  int
+        :param seconds: Time spent encoding
+        :type seconds:  float
+        """
+        with self._lock:
+            stats = self._stats.setdefault(
+                name, {'count': 0, 'nbytes': 0, 'encoded_nbytes': 0, 'seconds': 0.0}
+            )
+            stats['count'] += 1
+            stats['nbytes'] += nbytes
+            stats['encoded_nbytes'] += encoded_nbytes
+            stats['seconds'] += seconds
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Statistics of the data encoded with each codec.
+
+        :return: For each codec name, the number of encoded chunks or
+        images, uncompressed and compressed bytes, the compression ratio and
+        the encoding throughput in MB/s
+        :rtype:  Dict[str, Dict[str, float]]
+        """
+        with self._lock:
+            return {name: _summarize(stats) for name, stats in self._stats.items()}
+
+
+def _summarize(stats: Dict[str, float]) -> Dict[str, float]:
+    return dict(
+        stats,
+        ratio=stats['nbytes'] / max(stats['encoded_nbytes'], 1),
+        throughput=stats['nbytes'] / max(stats['seconds'], 1e-9) / 1e6,
+    )
+
+
+codec_policy = CodecPolicy()
@@ -1,5 +1,6 @@
-import os
-from itkwidgets.integrations import _detect_render_type, _get_viewer_image, _get_viewer_point_set
+from itkwidgets._method_types import setter_getters
+from itkwidgets.config import config as itkwidgets_config
+from itkwidgets.integrations import _build_viewer_image, _detect_render_type, _get_viewer_image, _get_viewer_point_set
 from itkwidgets.render_types import RenderType
 from itkwidgets.viewer_config import MUI_HREF, PYDATA_SPHINX_HREF
 
@@ -7,41 +8,59 @@ from itkwidgets.viewer_config import MUI_HREF, PYDATA_SPHINX_HREF
 DATA_OPTIONS = ["image", "label_image", "point_set", "data", "fixed_image"]
 INPUT_OPTIONS = [*DATA_OPTIONS, "compare"]
 
-def init_params_dict(itk_viewer):
+def init_params_methods():
+    return {
+        'annotations': 'setAnnotationsEnabled',
+        'axes': 'setAxesEnabled',
+        'bg_color': 'setBackgroundColor',
+        'blend_mode': 'setImageBlendMode',
+        'cmap': 'setImageColorMap',
+        'color_range': 'setImageColorRange',
+        'vmin': 'setImageColorRangeMin',
+        'vmax': 'setImageColorRangeMax',
+        'color_bounds': 'setImageColorRangeBounds',
+        'component_visible': 'setImageComponentVisibility',
+        'gradient_opacity': 'setImageGradientOpacity',
+        'gradient_opacity_scale': 'setImageGradientOpacityScale',
+        'interpolation': 'setImageInterpolationEnabled',
+        'transfer_function': 'setImagePiecewiseFunctionPoints',
+        'shadow_enabled': 'setImageShadowEnabled',
+        'sample_distance': 'setImageVolumeSampleDistance',
+        'label_blend': 'setLabelImageBlend',
+        'label_names': 'setLabelImageLabelNames',
+        'label_lut': 'setLabelImageLookupTable',
+        'label_weights': 'setLabelImageWeights',
+        'layer': 'selectLayer',
+        'layer_visible': 'setLayerVisibility',
+        'container_style': 'setRenderingViewContainerStyle',
+        'rotate': 'setRotateEnabled',
+        'ui_collapsed': 'setUICollapsed',
+        'units': 'setUnits',
+        'view_mode': 'setViewMode',
+        'x_slice': 'setXSlice',
+        'y_slice': 'setYSlice',
+        'z_slice': 'setZSlice',
+    }
+
+
+def state_params():
+    """The initialization parameters that can be read back from the viewer,
+    mapped to their viewer getter. Parameters of a single component or
+    layer, and those that are part of another, e.g. vmin of color_range, are
+    left out.
+    """
+    setters = setter_getters()
     return {
-        'annotations': itk_viewer.setAnnotationsEnabled,
-        'axes': itk_viewer.setAxesEnabled,
-        'bg_color': itk_viewer.setBackgroundColor,
-        'blend_mode': itk_viewer.setImageBlendMode,
-        'cmap': itk_viewer.setImageColorMap,
-        'color_range': itk_viewer.setImageColorRange,
-        'vmin': itk_viewer.setImageColorRangeMin,
-        'vmax': itk_viewer.setImageColorRangeMax,
-        'color_bounds': itk_viewer.setImageColorRangeBounds,
-        'component_visible': itk_viewer.setImageComponentVisibility,
-        'gradient_opacity': itk_viewer.setImageGradientOpacity,
-        'gradient_opacity_scale': itk_viewer.setImageGradientOpacityScale,
-        'interpolation': itk_viewer.setImageInterpolationEnabled,
-        'transfer_function': itk_viewer.setImagePiecewiseFunctionPoints,
-        'shadow_enabled': itk_viewer.setImageShadowEnabled,
-        'sample_distance': itk_viewer.setImageVolumeSampleDistance,
-        'label_blend': itk_viewer.setLabelImageBlend,
-        'label_names': itk_viewer.setLabelImageLabelNames,
-        'label_lut': itk_viewer.setLabelImageLookupTable,
-        'label_weights': itk_viewer.setLabelImageWeights,
-        'layer': itk_viewer.selectLayer,
-        'layer_visible': itk_viewer.setLayerVisibility,
-        'container_style': itk_viewer.setRenderingViewContainerStyle,
-        'rotate': itk_viewer.setRotateEnabled,
-        'ui_collapsed': itk_viewer.setUICollapsed,
-        'units': itk_viewer.setUnits,
-        'view_mode': itk_viewer.setViewMode,
-        'x_slice': itk_viewer.setXSlice,
-        'y_slice': itk_viewer.setYSlice,
-        'z_slice': itk_viewer.setZSlice,
+        key: setters[method][0]
+        for key, method in init_params_methods().items()
+        if method in setters and not setters[method][1]
     }
 
 
+def init_params_dict(itk_viewer):
+    return {key: getattr(itk_viewer, method) for key, method in init_params_methods().items()}
+
+
 def build_config(ui=None):
     if ui == "pydata-sphinx":
         config = {
@@ -61,7 +80,8 @@ def build_config(ui=None):
         config = ui
     else:
         config = {}
-    config['maxConcurrency'] = os.cpu_count() * 2
+    # Matches the number of requests served at once on the Python side
+    config['maxConcurrency'] = itkwidgets_config.rpc_concurrency()
 
     return config
 
@@ -75,7 +95,7 @@ def parse_input_data(init_data_kwargs):
     return inputs
 
 
-def build_init_data(input_data, stores):
+def build_init_data(input_data, stores, max_workers=None):
     result= None
     for input_type in DATA_OPTIONS:
         data = input_data.pop(input_type, None)
@@ -94,6 +114,7 @@ def build_init_data(input_data, stores):
             else:
                 result = _get_viewer_image(data, label=False)
                 stores['Image'] = result
+            _build_viewer_image(result, max_workers)
         elif render_type is RenderType.POINT_SET:
             result = _get_viewer_point_set(data)
         if result is None:
@@ -0,0 +1,504 @@
+import bisect
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import PurePosixPath
+from typing import Dict, Iterator, MutableMapping, Optional, Sequence, Tuple
+
+import dask.array
+import numpy as np
+import zarr
+from ngff_zarr import Multiscales, NgffImage, to_multiscales
+
+from ._codec_policy import CodecChoice, _summarize, codec_policy
+from .config import config
+
+_spatial_dims = ('x', 'y', 'z')
+
+
+def _metadata_dict(metadata) -> dict:
+    metadata_dict = asdict(metadata)
+    for axis in metadata_dict['axes']:
+        if axis.get('unit') is None:
+            axis.pop('unit', None)
+    for key in ('coordinateTransformations', 'omero'):
+        if metadata_dict.get(key) is None:
+            metadata_dict.pop(key, None)
+    metadata_dict['@type'] = 'ngff:Image'
+    return metadata_dict
+
+
+class LazyMultiscaleStore(zarr.storage.BaseStore):
+    """An OME-Zarr store for a multiscale image whose chunks are computed
+    from the multiscale's dask arrays only when they are first requested.
+
+    The NGFF metadata is written up front. Computed chunks are encoded and
+    memoized in the backing store, so each chunk is computed at most once.
+    """
+
+    def __init__(
+        self,
+        multiscales: Multiscales,
+        store: Optional[MutableMapping] = None,
+        derive_levels: bool = False,
+        source_chunks: Optional[Sequence[Sequence[int]]] = None,
+        probe_codecs: bool = False,
+        lazy_source: bool = False,
+    ) -> None:
+        """Create the store.
+
+        :param multiscales: Multiscale image with lazy dask arrays
+        :type multiscales:  Multiscales
+        :param store: Backing store for the metadata and computed chunks,
+        defaults to a new zarr.storage.MemoryStore
+        :type store:  MutableMapping, optional
+        :param derive_levels: Rebuild each resolution level > 1 from the
+        chunks of the previous level in this store, rather than from the
+        full resolution image, so intermediate results are shared. Requires
+        multiscales.method. default: False
+        :type derive_levels:  bool, optional
+        :param source_chunks: Dask chunks of an input that is expensive to
+        compute, e.g. an out-of-core pipeline. Full resolution chunks are
+        then computed one whole source block at a time, and with
+        derive_levels, all the other levels are built from the memoized
+        full resolution chunks so no source block is computed twice.
+        :type source_chunks:  tuple of tuples of int, optional
+        :param probe_codecs: Choose the compressor of each level from a
+        probe of a full resolution chunk, see CodecPolicy. Leave False for
+        inputs that are expensive to compute. default: False
+        :type probe_codecs:  bool, optional
+        :param lazy_source: The input is expensive to compute, e.g. a dask
+        pipeline or an on-disk zarr array, so the pyramid is not built ahead
+        of the viewer's requests unless explicitly asked for. default: False
+        :type lazy_source:  bool, optional
+        """
+        if store is None:
+            store = zarr.storage.MemoryStore(dimension_separator='/')
+        self._store = store
+        self._token = uuid.uuid4().hex
+        self._lazy_source = lazy_source
+        self._source_nbytes = int(multiscales.images[0].data.nbytes)
+        self._arrays: Dict[str, Tuple[dask.array.Array, Tuple[int, ...]]] = {}
+        self._codecs: Dict[str, CodecChoice] = {}
+        self._codec_stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+        self._fill_value = 0
+        self._chunk_locks: Dict[str, threading.Lock] = {}
+        self._chunk_locks_lock = threading.Lock()
+        self._nbytes = 0
+        # Guards the byte and chunk counts, which pool threads update
+        self._count_lock = threading.Lock()
+        # Chunk keys that have been counted as computed
+        self._counted_keys = set()
+        self._building = False
+        # Exception raised by the last build, if it failed
+        self._build_error: Optional[BaseException] = None
+        self._write_metadata(multiscales, probe_codecs)
+        paths = list(self._arrays)
+        # Number of computed chunks of each level, and whether it is complete
+        self._computed_chunks: Dict[str, int] = {path: 0 for path in paths}
+        self._level_complete = {path: threading.Event() for path in paths}
+        # Block boundaries of the source, along each axis, for the full
+        # resolution path
+        self._source_boundaries: Dict[str, Tuple[Tuple[int, ...], ...]] = {}
+        if source_chunks is not None:
+            path = multiscales.metadata.datasets[0].path
+            self._source_boundaries[path] = tuple(
+                tuple(np.cumsum((0,) + tuple(c)).tolist()) for c in source_chunks
+            )
+        # Levels are built in the order that completes the coarsest level
+        # first. Independent levels are built coarse to fine. Derived levels
+        # depend on every finer level that they are derived from, which are
+        # built first, finest to coarsest, followed by the remaining levels.
+        self._build_order = paths[::-1]
+        if derive_levels and multiscales.method is not None:
+            first_level = 1 if source_chunks is not None else 2
+            self._derive_levels(multiscales, first_level)
+            chain = paths[first_level - 1:]
+            self._build_order = chain + paths[:first_level - 1][::-1]
+
+    def _write_metadata(self, multiscales: Multiscales, probe_codecs: bool = False) -> None:
+        probe = None
+        if probe_codecs and config.adaptive_codecs:
+            data = multiscales.images[0].data
+            center = tuple(len(c) // 2 for c in data.chunks)
+            probe = codec_policy.probe(data.blocks[center].compute(scheduler='synchronous'))
+        root = zarr.open_group(self._store, mode='w')
+        root.attrs['multiscales'] = [_metadata_dict(multiscales.metadata)]
+        for image, dataset in zip(multiscales.images, multiscales.metadata.datasets):
+            path = dataset.path
+            parent = str(PurePosixPath(path).parent)
+            if parent not in ('.', '/'):
+                group = root.create_group(parent, overwrite=True)
+                group.attrs['_ARRAY_DIMENSIONS'] = list(image.dims)
+            data = image.data
+            chunks = tuple(min(c, s) for c, s in zip(data.chunksize, data.shape))
+            if probe is None:
+                codec = CodecChoice('default', zarr.storage.default_compressor)
+            else:
+                codec = codec_policy.select(probe, data.nbytes)
+            self._codecs[path] = codec
+            self._codec_stats[path] = {'count': 0, 'nbytes': 0, 'encoded_nbytes': 0, 'seconds': 0.0}
+            zarr.create(
+                shape=data.shape,
+                chunks=chunks,
+                dtype=data.dtype,
+                compressor=codec.compressor,
+                fill_value=self._fill_value,
+                store=self._store,
+                path=path,
+                dimension_separator='/',
+                overwrite=True,
+            )
+            self._arrays[path] = (data, chunks)
+        zarr.consolidate_metadata(self._store)
+        self._nbytes = sum(len(self._store[key]) for key in self._store.keys())
+
+    def _derive_levels(self, multiscales: Multiscales, first_level: int = 2) -> None:
+        paths = [dataset.path for dataset in multiscales.metadata.datasets]
+        images = multiscales.images
+        # By default, level 1 is computed directly from the full resolution
+        # image, which is cheaper than a round trip through the store when
+        # the image is in memory
+        for level in range(max(first_level, 1), len(images)):
+            previous = images[level - 1]
+            previous_array = zarr.open_array(self, mode='r', path=paths[level - 1])
+            previous_data = dask.array.from_zarr(
+                previous_array, name=f'lazy-multiscale-{self._token}-{paths[level - 1]}'
+            )
+            previous_image = NgffImage(
+                previous_data,
+                previous.dims,
+                previous.scale,
+                previous.translation,
+                previous.name,
+                previous.axes_units,
+            )
+            factors = {
+                d: max(int(round(images[level].scale[d] / previous.scale[d])), 1)
+                for d in previous.dims
+                if d in _spatial_dims
+            }
+            derived = to_multiscales(
+                previous_image,
+                scale_factors=[factors],
+                method=multiscales.method,
+                chunks=multiscales.chunks,
+                cache=False,
+            ).images[-1]
+            data, chunks = self._arrays[paths[level]]
+            if derived.data.shape == data.shape and derived.data.dtype == data.dtype:
+                self._arrays[paths[level]] = (derived.data, chunks)
+
+    def _parse_chunk_key(self, key: str) -> Optional[Tuple[str, Tuple[int, ...]]]:
+        for path, (data, chunks) in self._arrays.items():
+            if not key.startswith(path + '/'):
+                continue
+            parts = key[len(path) + 1:].split('/')
+            if len(parts) != data.ndim or not all(p.isdigit() for p in parts):
+                return None
+            coords = tuple(int(p) for p in parts)
+            grid = [-(-s // c) for s, c in zip(data.shape, chunks)]
+            if any(i >= n for i, n in zip(coords, grid)):
+                return None
+            return path, coords
+        return None
+
+    def _chunk_lock(self, key: str) -> threading.Lock:
+        with self._chunk_locks_lock:
+            return self._chunk_locks.setdefault(key, threading.Lock())
+
+    def _encode_block(self, path: str, block: np.ndarray, chunks: Tuple[int, ...], dtype) -> bytes:
+        block = np.asarray(block, dtype=dtype)
+        if block.shape != chunks:
+            # zarr chunks on the edge of the array are padded to full size
+            padded = np.full(chunks, self._fill_value, dtype=dtype)
+            padded[tuple(slice(0, n) for n in block.shape)] = block
+            block = padded
+        block = np.ascontiguousarray(block)
+        codec = self._codecs[path]
+        start = time.perf_counter()
+        if codec.compressor is None:
+            encoded = block.tobytes()
+        else:
+            encoded = codec.compressor.encode(block)
+        seconds = time.perf_counter() - start
+        with self._stats_lock:
+            stats = self._codec_stats[path]
+            stats['count'] += 1
+            stats['nbytes'] += block.nbytes
+            stats['encoded_nbytes'] += len(encoded)
+            stats['seconds'] += seconds
+        codec_policy.record(codec.name, block.nbytes, len(encoded), seconds)
+        return encoded
+
+    def _source_region(self, path: str, selection: Tuple[slice, ...]) -> Tuple[slice, ...]:
+        """Grow a selection to the boundaries of the source blocks it touches."""
+        region = []
+        for s, boundaries in zip(selection, self._source_boundaries[path]):
+            start = boundaries[bisect.bisect_right(boundaries, s.start) - 1]
+            stop = boundaries[bisect.bisect_left(boundaries, s.stop)]
+            region.append(slice(start, stop))
+        return tuple(region)
+
+    def _chunk_selection(self, path: str, coords: Tuple[int, ...]) -> Tuple[slice, ...]:
+        data, chunks = self._arrays[path]
+        return tuple(
+            slice(i * c, min((i + 1) * c, s))
+            for i, c, s in zip(coords, chunks, data.shape)
+        )
+
+    def _lock_key(self, key: str, path: str, coords: Tuple[int, ...]) -> str:
+        if path not in self._source_boundaries:
+            return key
+        # Requests for chunks in the same source blocks wait for one another
+        region = self._source_region(path, self._chunk_selection(path, coords))
+        return path + '/' + '/'.join(f'{r.start}:{r.stop}' for r in region)
+
+    def _compute_chunk(self, path: str, coords: Tuple[int, ...]) -> bytes:
+        data, chunks = self._arrays[path]
+        selection = self._chunk_selection(path, coords)
+        if path not in self._source_boundaries:
+            # Each chunk is computed in the calling thread. Concurrency comes
+            # from serving many chunk requests at once.
+            block = data[selection].compute(scheduler='synchronous')
+            return self._encode_block(path, block, chunks, data.dtype)
+
+        # Compute the source blocks under the chunk once, and memoize every
+        # chunk that lies entirely within them. The requested chunk always
+        # does.
+        region = self._source_region(path, selection)
+        region_block = data[region].compute(scheduler='synchronous')
+        first = [-(-r.start // c) for r, c in zip(region, chunks)]
+        last = [
+            r.stop // c if r.stop < s else -(-s // c)
+            for r, c, s in zip(region, chunks, data.shape)
+        ]
+        value = None
+        for grid_index in np.ndindex(*[max(b - a, 0) for a, b in zip(first, last)]):
+            chunk_coords = tuple(a + i for a, i in zip(first, grid_index))
+            key = path + '/' + '/'.join(str(i) for i in chunk_coords)
+            if chunk_coords != coords and key in self._store:
+                continue
+            chunk_selection = tuple(
+                slice(i * c - r.start, min((i + 1) * c, s) - r.start)
+                for i, c, s, r in zip(chunk_coords, chunks, data.shape, region)
+            )
+            encoded = self._encode_block(path, region_block[chunk_selection], chunks, data.dtype)
+            if chunk_coords == coords:
+                value = encoded
+            else:
+                self._memoize(key, path, encoded)
+        return value
+
+    def __getitem__(self, key: str) -> bytes:
+        try:
+            return self._store[key]
+        except KeyError:
+            pass
+        chunk = self._parse_chunk_key(key)
+        if chunk is None:
+            raise KeyError(key)
+        with self._chunk_lock(self._lock_key(key, *chunk)):
+            # Another request may have computed the chunk while we waited
+            try:
+                return self._store[key]
+            except KeyError:
+                pass
+            value = self._compute_chunk(*chunk)
+            self._memoize(key, chunk[0], value)
+        return value
+
+    def _memoize(self, key: str, path: str, value: bytes) -> None:
+        # Chunks of overlapping source regions may be written more than
+        # once, with the same value, but are only counted the first time,
+        # after they are written
+        self._store[key] = value
+        with self._count_lock:
+            if key in self._counted_keys:
+                return
+            self._counted_keys.add(key)
+            self._nbytes += len(value)
+            self._computed_chunks[path] += 1
+            complete = self._computed_chunks[path] >= self._chunk_count(path)
+        if complete:
+            self._level_complete[path].set()
+
+    def _chunk_count(self, path: str) -> int:
+        data, chunks = self._arrays[path]
+        return int(np.prod([-(-s // c) for s, c in zip(data.shape, chunks)]))
+
+    def __setitem__(self, key: str, value: bytes) -> None:
+        self._store[key] = value
+        with self._count_lock:
+            self._nbytes += len(value)
+
+    def __delitem__(self, key: str) -> None:
+        del self._store[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._store or self._parse_chunk_key(key) is not None
+
+    def _chunk_keys(self, path: Optional[str] = None) -> Iterator[str]:
+        paths = self._arrays.keys() if path is None else [path]
+        for path in paths:
+            data, chunks = self._arrays[path]
+            grid = [range(-(-s // c)) for s, c in zip(data.shape, chunks)]
+            for coords in np.ndindex(*[len(g) for g in grid]):
+                yield path + '/' + '/'.join(str(i) for i in coords)
+
+    def __iter__(self) -> Iterator[str]:
+        computed = set(self._store.keys())
+        yield from computed
+        for key in self._chunk_keys():
+            if key not in computed:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def build(self, max_workers: Optional[int] = None) -> None:
+        """Compute and memoize every chunk, computing the chunks of each
+        level in parallel. The coarsest level is completed first, so the
+        viewer can render while the finer levels are built, and each level
+        becomes available as soon as it is complete.
+
+        :param max_workers: Number of worker threads. default:
+        config.max_workers, or the number of CPUs
+        :type max_workers:  int, optional
+        """
+        max_workers = max_workers or config.max_workers or os.cpu_count()
+        with self._chunk_locks_lock:
+            self._building = True
+        self._build_error = None
+        try:
+            with ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix='itkwidgets-pyramid'
+            ) as executor:
+                for path in self._build_order:
+                    # Chunks that were already computed are returned immediately
+                    for _ in executor.map(self.__getitem__, self._chunk_keys(path)):
+                        pass
+                    self._level_complete[path].set()
+        except BaseException as e:
+            # Release the threads waiting for a level, which re-raise the
+            # error
+            self._build_error = e
+            for event in self._level_complete.values():
+                event.set()
+            raise
+        finally:
+            self._building = False
+
+    def start_build(self, max_workers: Optional[int] = None) -> Optional[threading.Thread]:
+        """Run build() in a background thread, unless the store is already
+        being built or is complete.
+
+        :param max_workers: Number of worker threads
+        :type max_workers:  int, optional
+        :return: The build thread, if one was started
+        :rtype:  threading.Thread | None
+        """
+        with self._chunk_locks_lock:
+            if self._building or all(e.is_set() for e in self._level_complete.values()):
+                return None
+            # Set before the thread starts so wait_for_level does not return
+            # early
+            self._building = True
+        thread = threading.Thread(
+            target=self.build,
+            kwargs={'max_workers': max_workers},
+            name='itkwidgets-pyramid-build',
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    @property
+    def in_memory(self) -> bool:
+        """Whether the computed chunks are held in memory."""
+        return isinstance(self._store, zarr.storage.MemoryStore)
+
+    @property
+    def lazy_source(self) -> bool:
+        """Whether the input is expensive to compute, so chunks are only
+        computed when they are requested unless a build is started
+        explicitly."""
+        return self._lazy_source
+
+    @property
+    def source_nbytes(self) -> int:
+        """Size of the full resolution image that the store computes its
+        chunks from, which it keeps alive."""
+        return self._source_nbytes
+
+    @property
+    def building(self) -> bool:
+        """Whether build() is running."""
+        return self._building
+
+    def progress(self) -> Dict[str, float]:
+        """Fraction of the chunks of each level that have been computed.
+
+        :return: Completion from 0.0 to 1.0 by dataset path, from the full
+        resolution level to the coarsest
+        :rtype:  Dict[str, float]
+        """
+        return {
+            path: min(self._computed_chunks[path] / self._chunk_count(path), 1.0)
+            for path in self._arrays
+        }
+
+    def codec_stats(self) -> Dict[str, Dict[str, float]]:
+        """The compressor of each level, with its probe results and the
+        statistics of the chunks encoded so far.
+
+        :return: By dataset path, the codec name, probe_ratio and
+        probe_throughput, the number of encoded chunks, uncompressed and
+        compressed bytes, the compression ratio and the encoding throughput
+        in MB/s
+        :rtype:  Dict[str, Dict[str, float]]
+        """
+        with self._stats_lock:
+            return {
+                path: dict(
+                    _summarize(self._codec_stats[path]),
+                    codec=codec.name,
+                    probe_ratio=codec.probe_ratio,
+                    probe_throughput=codec.probe_throughput,
+                )
+                for path, codec in self._codecs.items()
+            }
+
+    def wait_for_level(self, level: int = -1, timeout: Optional[float] = None) -> bool:
+        """Wait until all the chunks of a level have been computed.
+
+        :param level: Index of the level, -1, the default, is the coarsest
+        :type level:  int
+        :param timeout: Maximum time to wait in seconds, default: no limit
+        :type timeout:  float, optional
+        :return: Whether the level is complete. False without waiting when
+        the level is incomplete and no build is running.
+        :rtype:  bool
+        :raises RuntimeError: if the build failed before the level was
+        complete
+        """
+        path = list(self._arrays)[level]
+        event = self._level_complete[path]
+        if event.is_set() or self._building:
+            event.wait(timeout)
+        if self._computed_chunks[path] >= self._chunk_count(path):
+            return True
+        if self._build_error is not None:
+            raise RuntimeError('Building the image pyramid failed') from self._build_error
+        return False
+
+    def getsize(self, path: Optional[str] = None) -> int:
+        """Approximate number of bytes held in the backing store."""
+        return self._nbytes
+
+    def __dask_tokenize__(self) -> str:
+        return self._token
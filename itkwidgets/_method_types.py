@@ -44,4 +44,106 @@ def deferred_methods():
         'getXSlice',
         'getYSlice',
         'getZSlice',
-    ]
\ No newline at end of file
+    ]
+
+def coalesced_methods():
+    """Setters for which only the most recent call matters, mapped to the
+    positions of the arguments that identify what is set, e.g. the component
+    or layer. Earlier calls with the same identifying arguments can be
+    dropped.
+
+    Calls that change what the setters apply to, e.g. selectLayer, which
+    selects the layer of the image setters, are never coalesced. Like every
+    request that is not coalesced, they are a barrier that later calls are
+    not coalesced across.
+    """
+    return {
+        'setAnnotationsEnabled': (),
+        'setAxesEnabled': (),
+        'setBackgroundColor': (),
+        'setCroppingPlanes': (),
+        'setImageBlendMode': (),
+        'setImageColorMap': (),
+        'setImageColorRange': (),
+        'setImageColorRangeBounds': (),
+        'setImageColorRangeMax': (),
+        'setImageColorRangeMin': (),
+        'setImageComponentVisibility': (1,),
+        'setImageGradientOpacity': (),
+        'setImageGradientOpacityScale': (),
+        'setImageInterpolationEnabled': (),
+        'setImagePiecewiseFunctionPoints': (),
+        'setImageShadowEnabled': (),
+        'setImageVolumeSampleDistance': (),
+        'setImageVolumeScatteringBlend': (),
+        'setLabelImageBlend': (),
+        'setLabelImageLabelNames': (),
+        'setLabelImageLookupTable': (),
+        'setLabelImageWeights': (),
+        'setLayerVisibility': (1,),
+        'setRenderingViewContainerStyle': (),
+        'setRotateEnabled': (),
+        'setUICollapsed': (),
+        'setUnits': (),
+        'setViewMode': (),
+        'setXSlice': (),
+        'setYSlice': (),
+        'setZSlice': (),
+    }
+
+
+def request_key(method, args):
+    """The key under which a request is coalesced with earlier requests.
+
+    :param method: Name of the viewer API method
+    :type method:  str
+    :param args: Positional arguments of the request
+    :type args:  tuple
+    :return: The key, or None if the request is never coalesced
+    :rtype:  tuple | None
+    """
+    positions = coalesced_methods().get(method)
+    if positions is None:
+        return None
+    try:
+        return (method, *(args[i] for i in positions))
+    except IndexError:
+        return (method,)
+
+
+def setter_getters():
+    """Setters mapped to the getter that reads back the value they set, and
+    the positions of the setter arguments that are passed to the getter,
+    e.g. the component or layer. The value is the first argument.
+    """
+    return {
+        'setAnnotationsEnabled': ('getAnnotationsEnabled', ()),
+        'setAxesEnabled': ('getAxesEnabled', ()),
+        'setBackgroundColor': ('getBackgroundColor', ()),
+        'setCroppingPlanes': ('getCroppingPlanes', ()),
+        'setImageBlendMode': ('getImageBlendMode', ()),
+        'setImageColorMap': ('getImageColorMap', ()),
+        'setImageColorRange': ('getImageColorRange', ()),
+        'setImageColorRangeBounds': ('getImageColorRangeBounds', ()),
+        'setImageComponentVisibility': ('getImageComponentVisibility', (1,)),
+        'setImageGradientOpacity': ('getImageGradientOpacity', ()),
+        'setImageGradientOpacityScale': ('getImageGradientOpacityScale', ()),
+        'setImageInterpolationEnabled': ('getImageInterpolationEnabled', ()),
+        'setImagePiecewiseFunctionPoints': ('getImagePiecewiseFunctionPoints', ()),
+        'setImageShadowEnabled': ('getImageShadowEnabled', ()),
+        'setImageVolumeSampleDistance': ('getImageVolumeSampleDistance', ()),
+        'setImageVolumeScatteringBlend': ('getImageVolumeScatteringBlend', ()),
+        'setLabelImageBlend': ('getLabelImageBlend', ()),
+        'setLabelImageLabelNames': ('getLabelImageLabelNames', ()),
+        'setLabelImageLookupTable': ('getLabelImageLookupTable', ()),
+        'setLabelImageWeights': ('getLabelImageWeights', ()),
+        'setLayerVisibility': ('getLayerVisibility', (1,)),
+        'setRotateEnabled': ('getRotateEnabled', ()),
+        'setUICollapsed': ('getUICollapsed', ()),
+        'setUnits': ('getUnits', ()),
+        'setViewMode': ('getViewMode', ()),
+        'setXSlice': ('getXSlice', ()),
+        'setYSlice': ('getYSlice', ()),
+        'setZSlice': ('getZSlice', ()),
+    }
+
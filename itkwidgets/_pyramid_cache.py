@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import zarr
+
+from .config import config
+
+
+def ngff_image_fingerprint(ngff_image, method) -> Hashable:
+    """Build a cache key for the pyramid generated from an NgffImage.
+
+    The dask array name is a token of the array's task graph. For in-memory
+    arrays wrapped with dask.array.from_array, as done by to_ngff_image and
+    itk_image_to_ngff_image, the token is a hash of the buffer contents that
+    dask has already computed, so no additional pass over the pixels is
+    required.
+    """
+    data = ngff_image.data
+    axes_units = ngff_image.axes_units or {}
+    return (
+        data.name,
+        data.shape,
+        data.dtype.str,
+        tuple(ngff_image.dims),
+        tuple(sorted(ngff_image.scale.items())),
+        tuple(sorted(ngff_image.translation.items())),
+        tuple(sorted(axes_units.items())),
+        ngff_image.name,
+        method,
+    )
+
+
+def _store_nbytes(store: zarr.storage.BaseStore) -> int:
+    try:
+        nbytes = store.getsize()
+    except (AttributeError, TypeError, ValueError):
+        nbytes = 0
+    # Lazily computed stores also keep their source image alive
+    return nbytes + getattr(store, 'source_nbytes', 0)
+
+
+class PyramidCache:
+    """Least recently used cache of generated multiscale stores, bounded by
+    the number of bytes held in the stores.
+
+    Only stores held in memory are cached. A store in a temporary directory
+    is removed with its directory once it is no longer referenced. Stores
+    are measured again whenever the cache is used, since lazily computed
+    stores grow as their chunks are computed.
+    """
+
+    def __init__(self):
+        self._stores = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Total number of bytes held by the cached stores, and the source
+        images of lazily computed stores, which grow as their chunks are
+        requested.
+
+        :return: Size of the cached stores in bytes
+        :rtype:  int
+        """
+        return sum(_store_nbytes(store) for store in self._stores.values())
+
+    def get(self, key: Hashable) -> Optional[zarr.storage.BaseStore]:
+        """Return the cached store for key and mark it as recently used, then
+        evict the least recently used stores that no longer fit.
+
+        :param key: Fingerprint of the source image
+        :type key:  Hashable
+        :return: The cached store, or None if not present
+        :rtype:  zarr.storage.BaseStore | None
+        """
+        with self._lock:
+            store = self._stores.get(key)
+            if store is not None:
+                self._stores.move_to_end(key)
+                self._evict()
+            return store
+
+    def put(self, key: Hashable, store: zarr.storage.BaseStore) -> None:
+        """Cache a store and evict the least recently used stores until the
+        cache fits in config.pyramid_cache_max_bytes.
+
+        :param key: Fingerprint of the source image
+        :type key:  Hashable
+        :param store: The generated multiscale store
+        :type store:  zarr.storage.BaseStore
+        """
+        nbytes = _store_nbytes(store)
+        max_bytes = config.pyramid_cache_max_bytes
+        with self._lock:
+            if nbytes > max_bytes:
+                return
+            self._stores[key] = store
+            self._stores.move_to_end(key)
+            self._evict()
+
+    def _evict(self) -> None:
+        max_bytes = config.pyramid_cache_max_bytes
+        sizes = [_store_nbytes(store) for store in self._stores.values()]
+        nbytes = sum(sizes)
+        for size in sizes:
+            if nbytes <= max_bytes:
+                break
+            self._stores.popitem(last=False)
+            nbytes -= size
+
+    def clear(self) -> None:
+        """Remove all cached stores."""
+        with self._lock:
+            self._stores.clear()
+
+
+pyramid_cache = PyramidCache()
@@ -0,0 +1,78 @@
+import math
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+from .config import config
+
+_spatial_dims = ('x', 'y', 'z')
+
+
+def _default_chunks(dims: Sequence[str]) -> int:
+    # The ngff_zarr defaults
+    return 128 if 'z' in dims else 256
+
+
+def plan_scale_factors(
+    dims: Sequence[str],
+    shape: Sequence[int],
+    scale: Optional[Mapping[str, float]] = None,
+    chunks: Union[int, Mapping[str, int], None] = None,
+    texture_size: Optional[int] = None,
+) -> List[Dict[str, int]]:
+    """Plan per-axis scale factors for a multiscale pyramid.
+
+    Each level halves the axes with the finest physical spacing, so that
+    anisotropic images, e.g. light-sheet stacks with a coarse z spacing, are
+    downsampled in-plane until their voxels are close to isotropic rather
+    than losing their few z samples early. Axes that are larger than the
+    client's texture size are always halved so that a level that fits on
+    the GPU is reached as soon as possible. An axis is not halved below the
+    chunk size, which would only add levels without reducing the number of
+    chunks, and the pyramid stops once the coarsest level spans at most two
+    chunks along every axis.
+
+    :param dims: Dimension names, e.g. ('z', 'y', 'x')
+    :type dims:  Sequence[str]
+    :param shape: Size of the full resolution image along each dimension
+    :type shape:  Sequence[int]
+    :param scale: Physical pixel spacing by dimension name, default: 1.0
+    :type scale:  Mapping[str, float], optional
+    :param chunks: Output chunk size, as a single size or by dimension name.
+    default: 128 for 3D and 256 for 2D, as in ngff_zarr
+    :type chunks:  int | Mapping[str, int], optional
+    :param texture_size: Largest texture dimension expected on the client.
+    default: config.texture_size
+    :type texture_size:  int, optional
+    :return: Absolute scale factors of each level after the first, suitable
+    for the scale_factors argument of ngff_zarr.to_multiscales
+    :rtype:  List[Dict[str, int]]
+    """
+    scale = scale or {}
+    if chunks is None:
+        chunks = _default_chunks(dims)
+    if isinstance(chunks, int):
+        chunks = {d: chunks for d in dims}
+    if texture_size is None:
+        texture_size = config.texture_size
+
+    spatial = [d for d in dims if d in _spatial_dims]
+    sizes = {d: int(shape[list(dims).index(d)]) for d in spatial}
+    spacing = {d: abs(float(scale.get(d, 1.0))) or 1.0 for d in spatial}
+    factors = {d: 1 for d in spatial}
+
+    scale_factors = []
+    while any(sizes[d] > 2 * chunks[d] for d in spatial):
+        # Halving these axes still reduces the number of chunks
+        candidates = [d for d in spatial if sizes[d] // 2 >= chunks[d]]
+        if not candidates:
+            break
+        finest = min(spacing[d] * factors[d] for d in candidates)
+        halve = [
+            d for d in candidates
+            if sizes[d] > texture_size or spacing[d] * factors[d] < finest * math.sqrt(2)
+        ]
+        for d in halve:
+            factors[d] *= 2
+            sizes[d] //= 2
+        scale_factors.append(dict(factors))
+
+    return scale_factors
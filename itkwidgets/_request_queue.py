@@ -0,0 +1,271 @@
+import asyncio
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+
+from ._method_types import request_key
+from .config import config
+
+Request = Tuple[str, tuple, dict]
+
+
+def send_batch(itk_viewer: Any, requests: List[Request]) -> None:
+    """Send requests to the viewer one after the other, in order, without
+    waiting for each other. The viewer has no method that applies several
+    requests at once, so each request is still applied, and rendered, on
+    its own.
+
+    :param itk_viewer: The viewer plugin API
+    :type itk_viewer:  dict
+    :param requests: The (method, args, kwargs) requests, in order
+    :type requests:  List[Tuple[str, tuple, dict]]
+    """
+    for method, args, kwargs in requests:
+        getattr(itk_viewer, method)(*args, **kwargs)
+
+
+class CoalescingQueue:
+    """A FIFO queue of viewer requests where a setter call replaces any
+    earlier queued call with the same request key, last write wins.
+
+    The replacing call takes the position of the latest call, so the
+    surviving requests keep the order in which they were last made and the
+    final viewer state is unchanged. Requests that are never coalesced, e.g.
+    selectLayer or setImage, are barriers: calls made after them are not
+    coalesced with calls made before them, which may apply to another layer
+    or image.
+    """
+
+    def __init__(self) -> None:
+        self._requests: 'OrderedDict[object, Request]' = OrderedDict()
+        self._counter = itertools.count()
+        # Key of the latest barrier
+        self._barrier = -1
+        self._lock = threading.Lock()
+
+    def put(self, request: Request) -> None:
+        method, args, _ = request
+        key = request_key(method, args)
+        with self._lock:
+            if key is None:
+                # Requests that are never coalesced get a unique key
+                self._barrier = next(self._counter)
+                self._requests[self._barrier] = request
+                return
+            key = (self._barrier, key)
+            self._requests.pop(key, None)
+            self._requests[key] = request
+
+    def get(self) -> Request:
+        with self._lock:
+            return self._requests.popitem(last=False)[1]
+
+    def qsize(self) -> int:
+        with self._lock:
+            return len(self._requests)
+
+    def drain(self) -> List[Request]:
+        """Remove and return all the queued requests, in order."""
+        with self._lock:
+            requests = list(self._requests.values())
+            self._requests.clear()
+        return requests
+
+
+class RequestDebouncer:
+    """Limit setter calls to a live viewer to one request per key per
+    config.debounce_seconds.
+
+    A call is sent immediately when no window is open, which opens one.
+    Calls within the window are coalesced like in CoalescingQueue and sent,
+    in the order in which they were last made, when the window closes, so a
+    sweep over many values sends the first and the latest value of each
+    window. Without a running event loop, requests are sent immediately.
+    Requests that are never coalesced, e.g. selectLayer, send the pending
+    calls before they are sent themselves.
+    """
+
+    def __init__(self, send: Callable[[str, tuple, dict], None]) -> None:
+        self._send = send
+        self._window: Optional[asyncio.TimerHandle] = None
+        self._pending: 'OrderedDict[tuple, Request]' = OrderedDict()
+
+    def request(self, method: str, args: tuple, kwargs: dict) -> None:
+        key = request_key(method, args)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if key is None or loop is None or not config.debounce_seconds:
+            # Keep the order of requests
+            self.flush()
+            self._send(method, args, kwargs)
+            return
+        if self._window is not None:
+            self._pending.pop(key, None)
+            self._pending[key] = (method, args, kwargs)
+            return
+        self._send(method, args, kwargs)
+        self._window = loop.call_later(config.debounce_seconds, self._close_window, loop)
+
+    def _close_window(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._window = None
+        if self._pending:
+            self._send_pending()
+            # Keep limiting the rate while the calls continue
+            self._window = loop.call_later(config.debounce_seconds, self._close_window, loop)
+
+    def _send_pending(self) -> None:
+        pending, self._pending = self._pending, OrderedDict()
+        for request in pending.values():
+            self._send(*request)
+
+    def flush(self) -> None:
+        """Send the pending requests now, e.g. before a getter."""
+        if self._window is not None:
+            self._window.cancel()
+            self._window = None
+        self._send_pending()
+
+
+class ViewerRequests:
+    """The requests queued for one viewer until it is ready for them."""
+
+    def __init__(self, send: Callable[[str, tuple, dict], None]) -> None:
+        self.send = send
+        # Requests that can be sent once the viewer is created
+        self.queue = CoalescingQueue()
+        # Requests that need the viewer's data to be rendered
+        self.deferred_queue = CoalescingQueue()
+        self.viewer_ready = asyncio.Event()
+        self.data_ready = asyncio.Event()
+
+
+class RequestScheduler:
+    """Send the requests queued for every viewer from a single task on the
+    event loop.
+
+    Viewers are registered with their own queues. Whenever a viewer becomes
+    ready, or a request is queued, the task sends the queued requests of
+    every viewer that can take them: the requests that only need the viewer
+    first, then those that need its data to be rendered. Nothing blocks the
+    event loop while viewers are being created.
+    """
+
+    def __init__(self) -> None:
+        self._viewers: 'weakref.WeakValueDictionary[str, ViewerRequests]' = weakref.WeakValueDictionary()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._task is not None and not self._task.done():
+                return
+            try:
+                self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._loop = asyncio.get_event_loop()
+            self._wake = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+
+    def register(self, name: str, send: Callable[[str, tuple, dict], None]) -> ViewerRequests:
+        """Add a viewer. The scheduler only keeps a weak reference to the
+        returned queues, which the viewer holds.
+
+        :param name: Unique name of the viewer
+        :type name:  str
+        :param send: Called with the method name, args and kwargs of each
+        request to send it to the viewer
+        :type send:  Callable
+        :return: The viewer's request queues
+        :rtype:  ViewerRequests
+        """
+        self._start()
+        requests = ViewerRequests(send)
+        self._viewers[name] = requests
+        return requests
+
+    def _call_in_loop(self, fn: Callable, *args) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            fn(*args)
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def notify(self) -> None:
+        """Wake the scheduler, e.g. after a request was queued."""
+        self._call_in_loop(lambda: self._wake.set())
+
+    def _set(self, name: str, data: bool) -> None:
+        requests = self._viewers.get(name)
+        if requests is None:
+            return
+        (requests.data_ready if data else requests.viewer_ready).set()
+        self._wake.set()
+
+    def set_viewer_ready(self, name: str) -> None:
+        """Mark a viewer as created, so its queued requests are sent.
+
+        :param name: Unique name of the viewer
+        :type name:  str
+        """
+        self._call_in_loop(self._set, name, False)
+
+    def set_data_ready(self, name: str) -> None:
+        """Mark a viewer's data as rendered, so its deferred requests are
+        sent.
+
+        :param name: Unique name of the viewer
+        :type name:  str
+        """
+        self._call_in_loop(self._set, name, True)
+
+    async def wait_ready(self, name: str, data: bool = False) -> None:
+        """Wait until a viewer is created, or its data is rendered.
+
+        :param name: Unique name of the viewer
+        :type name:  str
+        :param data: Wait for the data to be rendered. default: False
+        :type data:  bool
+        """
+        requests = self._viewers[name]
+        await (requests.data_ready if data else requests.viewer_ready).wait()
+
+    def _send_all(self, requests: ViewerRequests, queue: CoalescingQueue) -> None:
+        for method, args, kwargs in queue.drain():
+            try:
+                requests.send(method, args, kwargs)
+            except Exception as e:
+                self._loop.call_exception_handler({
+                    'message': f'Could not send the queued {method} request to the viewer',
+                    'exception': e,
+                })
+
+    def _send_ready(self) -> None:
+        viewers = list(self._viewers.values())
+        for requests in viewers:
+            if requests.viewer_ready.is_set():
+                self._send_all(requests, requests.queue)
+        for requests in viewers:
+            if requests.viewer_ready.is_set() and requests.data_ready.is_set():
+                self._send_all(requests, requests.deferred_queue)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            # Viewers are not referenced between wake ups, so they can be
+            # garbage collected
+            self._send_ready()
+
+
+scheduler = RequestScheduler()
@@ -0,0 +1,65 @@
+import math
+from typing import Sequence, Tuple
+
+_spatial_dims = ('x', 'y', 'z')
+
+
+def roi_slices(image, bounds: Sequence[float]) -> Tuple[slice, ...]:
+    """Slices that extract a region of interest from an image, e.g. one
+    level of a multiscale image.
+
+    The slices cover every voxel that overlaps the bounds, and select all
+    of the non-spatial dimensions, e.g. channels.
+
+    :param image: Image to slice
+    :type image:  NgffImage
+    :param bounds: World bounds of the region, as returned by the viewer's
+    getCroppedImageWorldBounds: [x0, x1, y0, y1, z0, z1]
+    :type bounds:  Sequence[float]
+    :return: A slice for each dimension of the image data
+    :rtype:  Tuple[slice, ...]
+    """
+    lower = dict(zip(_spatial_dims, bounds[0::2]))
+    upper = dict(zip(_spatial_dims, bounds[1::2]))
+    slices = []
+    for dim, size in zip(image.dims, image.data.shape):
+        if dim not in _spatial_dims:
+            slices.append(slice(None))
+            continue
+        scale = image.scale.get(dim, 1.0)
+        translation = image.translation.get(dim, 0.0)
+        # Round off floating point error before moving to the voxel grid
+        start = math.floor(round((lower[dim] - translation) / scale + 0.5, 6))
+        stop = math.ceil(round((upper[dim] - translation) / scale - 0.5, 6)) + 1
+        slices.append(slice(min(max(start, 0), size), min(max(stop, 0), size)))
+    return tuple(slices)
+
+
+def roi_image(image, bounds: Sequence[float], name: str):
+    """Extract a region of interest from an image.
+
+    :param image: Image to extract the region from
+    :type image:  NgffImage
+    :param bounds: World bounds of the region: [x0, x1, y0, y1, z0, z1]
+    :type bounds:  Sequence[float]
+    :param name: Name of the resulting image
+    :type name:  str
+    :return: The region, positioned at its origin in world space
+    :rtype:  NgffImage
+    """
+    from ngff_zarr import to_ngff_image
+    slices = roi_slices(image, bounds)
+    translation = {
+        dim: image.translation.get(dim, 0.0) + (s.start or 0) * image.scale.get(dim, 1.0)
+        for dim, s in zip(image.dims, slices)
+        if dim in _spatial_dims
+    }
+    data = image.data[slices].rechunk(image.data.chunksize)
+    return to_ngff_image(
+        data,
+        dims=image.dims,
+        scale=image.scale,
+        translation=translation,
+        name=name,
+        axes_units=image.axes_units
+    )
@@ -1,36 +1,44 @@
-import itkwasm
-import zarr
-import numpy as np
-import dask
-
-from .integrations.itk import HAVE_ITK
-from .integrations.pytorch import HAVE_TORCH
-from .integrations.vtk import HAVE_VTK
-from .integrations.xarray import HAVE_XARRAY
-from typing import Dict, List, Literal, Union, Sequence
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Union, Sequence
 
 Points2d = Sequence[Sequence[float]]
 
 Style = Dict[str, str]
 
-Image = Union[np.ndarray, itkwasm.Image, zarr.Group]
-PointSet = Union[np.ndarray, itkwasm.PointSet, zarr.Group]
 CroppingPlanes = {Literal['origin']: List[float], Literal['normal']: List[int]}
 
-if HAVE_ITK:
+if TYPE_CHECKING:
+    # The supported data types are only imported for static type checking so
+    # that importing itkwidgets does not import every optional dependency
+    import dask.array
     import itk
-    Image = Union[Image, itk.Image]
-if HAVE_VTK:
-    import vtk
-    Image = Union[Image, vtk.vtkImageData]
-    PointSet = Union[PointSet, vtk.vtkPolyData]
-Image = Union[Image, dask.array.core.Array]
-PointSet = Union[PointSet, dask.array.core.Array]
-if HAVE_TORCH:
+    import itkwasm
+    import numpy as np
     import torch
-    Image = Union[Image, torch.Tensor]
-    PointSet = Union[PointSet, torch.Tensor]
-if HAVE_XARRAY:
+    import vtk
     import xarray
-    Image = Union[Image, xarray.DataArray, xarray.Dataset]
-    PointSet = Union[PointSet, xarray.DataArray, xarray.Dataset]
+    import zarr
+
+    Image = Union[
+        np.ndarray,
+        itkwasm.Image,
+        zarr.Group,
+        itk.Image,
+        vtk.vtkImageData,
+        dask.array.core.Array,
+        torch.Tensor,
+        xarray.DataArray,
+        xarray.Dataset,
+    ]
+    PointSet = Union[
+        np.ndarray,
+        itkwasm.PointSet,
+        zarr.Group,
+        vtk.vtkPolyData,
+        dask.array.core.Array,
+        torch.Tensor,
+        xarray.DataArray,
+        xarray.Dataset,
+    ]
+else:
+    Image = Any
+    PointSet = Any
@@ -1,16 +1,53 @@
+import ast
 import asyncio
+import builtins
 import sys
 from inspect import isawaitable, iscoroutinefunction
-from typing import Callable, Dict, List
+from typing import Callable, Dict, List, Optional, Set
 from IPython import get_ipython
-from IPython.core.interactiveshell import ExecutionResult
+from IPython.core.interactiveshell import ExecutionInfo, ExecutionResult
 from queue import Queue
-from imjoy_rpc.utils import FuturePromise
 from zmq.eventloop.zmqstream import ZMQStream
 
 background_tasks = set()
 
 
+# Builtins that bind names in the namespace of the cell
+_binding_builtins = {'exec', 'eval', 'globals', 'vars', 'setattr', '__import__'}
+
+
+def _calls_binding_function(node: ast.AST) -> bool:
+    # Functions defined in the notebook may bind names with `global`, as may
+    # some builtins. Other builtins and methods, e.g. viewer.get_x_slice(),
+    # are assumed not to.
+    if isinstance(node, ast.Global):
+        return True
+    if not isinstance(node, ast.Call) or not isinstance(node.func, ast.Name):
+        return False
+    name = node.func.id
+    return name in _binding_builtins or not hasattr(builtins, name)
+
+
+def _assigned_names(code: str) -> Optional[Set[str]]:
+    """Names that a transformed cell binds, or None if they cannot be
+    found, e.g. when the cell cannot be parsed, runs magics or calls a
+    function that may assign globals."""
+    if 'get_ipython().run_' in code:
+        # Magics, e.g. %time x = ..., bind names from their string arguments
+        return None
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    nodes = list(ast.walk(tree))
+    if any(_calls_binding_function(node) for node in nodes):
+        return None
+    return {
+        node.id for node in nodes
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store)
+    }
+
+
 class Viewers(object):
     """This class is designed to track each instance of the Viewer class that
     is instantiated as well as whether or not that instance is available for
@@ -102,6 +139,14 @@ class CellWatcher(object):
         self.current_request = None
         self.waiting_on_viewer = False
         self.results = {}
+        # Names in the user namespace that may be bound to the futures in
+        # results, None to check every name
+        self.result_names = set()
+        # Source of the running cell, until the names it binds are found
+        self.cell_source = None
+        # Names that the running cell binds, None if they are unknown
+        self.cell_names = set()
+        self.cell_running = False
         self.abort_all = False
 
         self._events = Queue()
@@ -114,6 +159,7 @@ class CellWatcher(object):
             # ipykernel < 6
             self.kernel.shell_handlers["execute_request"] = self.capture_event
 
+        self.shell.events.register("pre_run_cell", self.pre_run_cell)
         # Call self.post_run_cell every time the post_run_cell signal is emitted
         # post_run_cell runs after interactive execution (e.g. a cell in a notebook)
         self.shell.events.register("post_run_cell", self.post_run_cell)
@@ -294,14 +340,38 @@ class CellWatcher(object):
             # Continue processing the remaining queued tasks
             self.create_task(self.execute_next_request)
 
+    def add_result(self, key: object, future: asyncio.Future) -> None:
+        """Track the future of a getter called from the running cell, and
+        the names that the cell binds, one of which may hold the future. The
+        names are found when the getter is called because the future may
+        resolve before the cell finishes, e.g. while it awaits.
+
+        :param key: Unique key of the request
+        :type key:  object
+        :param future: The future for the getter's value
+        :type future:  asyncio.Future
+        """
+        self.results[key] = future
+        if self.cell_source is not None:
+            self.cell_names = _assigned_names(self.shell.transform_cell(self.cell_source))
+            self.cell_source = None
+        if self.cell_names is None or self.result_names is None:
+            self.result_names = None
+        else:
+            self.result_names |= self.cell_names
+
     def update_namespace(self) -> None:
         """Update the namespace variables with the results from the getters"""
         # FIXME: This is a temporary "fix" and does not handle updating output
-        keys = [k for k in self.shell.user_ns.keys()]
+        result_names, self.result_names = self.result_names, set()
+        if result_names is None:
+            # Fall back to checking every name
+            result_names = list(self.shell.user_ns.keys())
+        futures = {id(f) for f in self.results.values()}
         try:
-            for key in keys:
-                value = self.shell.user_ns[key]
-                if asyncio.isfuture(value) and (isinstance(value, FuturePromise) or isinstance(value, asyncio.Task)):
+            for key in result_names:
+                value = self.shell.user_ns.get(key)
+                if value is not None and id(value) in futures:
                     # Getters/setters return futures
                     # They should all be resolved now, so use the result
                     self.shell.user_ns[key] = value.result()
@@ -320,9 +390,25 @@ class CellWatcher(object):
         # After each getter/setter resolves check if they've all resolved
         if self.all_getters_resolved:
             self.update_namespace()
+            if self.cell_running:
+                # The getters resolved while the cell awaits, the next cell
+                # is run once it finishes
+                return
             self.current_request = None
             self.create_task(self.execute_next_request)
 
+    def pre_run_cell(self, info: ExecutionInfo) -> None:
+        """Runs before interactive execution (e.g. a cell in a notebook).
+        Keep the source of the cell to find the names it binds if it calls
+        getters.
+
+        :param info: The cell that is about to run
+        :type info:  ExecutionInfo
+        """
+        self.cell_running = True
+        self.cell_source = info.raw_cell
+        self.cell_names = set()
+
     def post_run_cell(self, response: ExecutionResult) -> None:
         """Runs after interactive execution (e.g. a cell in a notebook). Set
         the abort flag if there are errors produced by cell execution.
@@ -333,3 +419,6 @@ class CellWatcher(object):
         # Abort remaining cells on error in execution
         if response.error_in_exec is not None:
             self.abort_all = True
+        self.cell_running = False
+        self.cell_source = None
+        self.cell_names = set()
@@ -0,0 +1,81 @@
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+def _default_cache_dir() -> Optional[str]:
+    return os.environ.get('ITKWIDGETS_CACHE_DIR', None)
+
+
+@dataclass
+class ItkwidgetsConfig:
+    """Runtime configuration for itkwidgets.
+
+    Update the attributes of the module level `config` instance, e.g.
+
+      from itkwidgets.config import config
+      config.memory_store_max_bytes = 4 * 2**30
+    """
+
+    # Multiscale images larger than this, in bytes, are written to a
+    # temporary directory store instead of being held in memory.
+    memory_store_max_bytes: int = 2**30
+    # Parent directory of the on-disk multiscale cache. None, the default,
+    # uses the system temporary directory. The ITKWIDGETS_CACHE_DIR
+    # environment variable sets the default.
+    cache_dir: Optional[str] = field(default_factory=_default_cache_dir)
+    # Generated pyramids held in memory are kept, least recently used first
+    # out, for re-use when the same image is displayed again. 0 disables the
+    # cache.
+    pyramid_cache_max_bytes: int = 2 * 2**30
+    # Build image pyramids in background threads, coarsest level first, as
+    # soon as an image is given to a viewer. When False, chunks are only
+    # computed when the viewer requests them, unless max_workers is passed
+    # to the viewer. Dask arrays and zarr arrays are only built ahead of the
+    # viewer when max_workers is passed.
+    background_build: bool = True
+    # Number of threads used to compute pyramid chunks in parallel when a
+    # pyramid is built ahead of the viewer's requests. None uses the number
+    # of CPUs.
+    max_workers: Optional[int] = None
+    # Largest texture dimension expected on the client GPU. Pyramid levels
+    # are planned so that a level within this size is reached quickly.
+    texture_size: int = 2048
+    # Maximum number of bytes of chunk data returned by one batched
+    # getItems request from the viewer. At least one chunk is always
+    # returned.
+    rpc_batch_max_bytes: int = 32 * 2**20
+    # Chunks served to viewers from stores that are not held in memory, e.g.
+    # on-disk pyramids or remote zarr stores, are cached up to this many
+    # bytes. 0 disables the cache.
+    chunk_cache_max_bytes: int = 512 * 2**20
+    # Number of viewer requests for store items that are served at once,
+    # which is also advertised to the viewer as its maxConcurrency. None
+    # uses twice the number of CPUs. Changes apply to the following requests,
+    # and to the maxConcurrency of viewers created afterwards.
+    rpc_max_workers: Optional[int] = None
+    # Choose the compressor of each pyramid level and image sent to the
+    # viewer from a quick probe of the data: incompressible data is sent
+    # uncompressed, coarse levels favor fast lz4 decoding. When False, Blosc
+    # lz4 is always used.
+    adaptive_codecs: bool = True
+    # Repeated calls to the same viewer setter, e.g. set_z_slice in a loop,
+    # are sent at most once per this many seconds, with the latest value.
+    # 0 sends every call.
+    debounce_seconds: float = 0.05
+    # Maximum time, in seconds, that a new viewer waits for the coarsest
+    # level of its image pyramids to be built before it is created. The
+    # viewer then requests the chunks it needs, which are computed on
+    # demand.
+    coarse_level_timeout: float = 10.0
+
+    def rpc_concurrency(self) -> int:
+        """Number of store requests served at once.
+
+        :return: rpc_max_workers, or twice the number of CPUs
+        :rtype:  int
+        """
+        return self.rpc_max_workers or (os.cpu_count() or 1) * 2
+
+
+config = ItkwidgetsConfig()
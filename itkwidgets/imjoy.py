@@ -1,54 +1,191 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict
-
-from typing import Dict 
-
-import itkwasm
-import numcodecs
-from imjoy_rpc import api
-import zarr
-
-_numcodec_encoder = numcodecs.Blosc(cname='lz4', clevel=3)
-_numcodec_config = _numcodec_encoder.get_config()
+from functools import lru_cache
+
+from typing import Callable, Dict, List, Optional
+
+from ._chunk_cache import chunk_cache
+from ._codec_policy import codec_policy
+from .config import config
+from .integrations.environment import ENVIRONMENT, Env
+
+# itkwasm, numcodecs and zarr are imported when the codecs are registered,
+# i.e. when the first viewer is created, rather than on `import itkwidgets`
+
+@lru_cache(maxsize=None)
+def _uncompressed_codec():
+    # The viewer decodes every image buffer with Blosc, which also stores
+    # data uncompressed at clevel 0
+    import numcodecs
+    return numcodecs.Blosc(cname='lz4', clevel=0, shuffle=numcodecs.Blosc.NOSHUFFLE)
+
+def _encode_buffer(array, probe: bool = True) -> Dict:
+    import numpy as np
+    import numcodecs.blosc
+
+    # A view, rather than a copy, unless the array is not contiguous
+    array = np.ascontiguousarray(array)
+    codec = codec_policy.choose(array, array.nbytes) if probe else codec_policy.default()
+    encoder = codec.compressor or _uncompressed_codec()
+    if array.nbytes > numcodecs.blosc.MAX_BUFFERSIZE:
+        raise ValueError(f'Cannot encode {array.nbytes} bytes in a single Blosc buffer, '
+            f'the maximum is {numcodecs.blosc.MAX_BUFFERSIZE}. Pass the image as a '
+            'multiscale zarr store, e.g. a dask array, instead.')
+    # Blosc compresses the blocks of the buffer with its global thread pool,
+    # whose process-wide settings are left to the user
+    start = time.perf_counter()
+    encoded = encoder.encode(array)
+    codec_policy.record(codec.name, array.nbytes, len(encoded), time.perf_counter() - start)
+    return { 'buffer': encoded, 'config': encoder.get_config(), 'nbytes': array.nbytes }
 
 def encode_itkwasm_image(image):
-    global _numcodec_encoder
-
-    image_dict = asdict(image)
-
-    image_data = image_dict['data']
-    encoded_data = _numcodec_encoder.encode(image_data)
-    image_dict['data'] = { 'buffer': encoded_data, 'config': _numcodec_config, 'nbytes': image_data.nbytes }
-
-    image_direction = image_dict['direction']
-    encoded_direction = _numcodec_encoder.encode(image_direction)
-    image_dict['direction'] = { 'buffer': encoded_direction, 'config': _numcodec_config, 'nbytes': image_direction.nbytes }
+    # The fields are read directly: dataclasses.asdict would deep copy the
+    # pixel buffer before it is compressed
+    image_dict = {
+        'imageType': asdict(image.imageType),
+        'name': image.name,
+        'origin': list(image.origin),
+        'spacing': list(image.spacing),
+        'direction': _encode_buffer(image.direction, probe=False),
+        'size': list(image.size),
+        'metadata': dict(image.metadata),
+        'data': None if image.data is None else _encode_buffer(image.data),
+        'bufferedRegion': None if image.bufferedRegion is None else asdict(image.bufferedRegion),
+    }
 
     return image_dict
 
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+def _store_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_workers
+    workers = config.rpc_concurrency()
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            # Re-created when config.rpc_max_workers changes. Reads that
+            # were already submitted finish on the previous pool.
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix='itkwidgets-store',
+            )
+            _executor_workers = workers
+        return _executor
+
+async def _in_executor(fn: Callable, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_store_executor(), fn, *args)
+
+def _batch_items(keys: List[str], values: List[Optional[bytes]]) -> Dict[str, Optional[bytes]]:
+    # Missing keys map to None. Once config.rpc_batch_max_bytes is reached,
+    # the remaining keys are left out of the result and should be requested
+    # again.
+    items = {}
+    nbytes = 0
+    for key, value in zip(keys, values):
+        if value is not None:
+            if items and nbytes + len(value) > config.rpc_batch_max_bytes:
+                break
+            nbytes += len(value)
+        items[key] = value
+    return items
+
 def encode_zarr_store(store):
+    # Reads go through a shared chunk cache that also coalesces concurrent
+    # requests for the same chunk
     def getItem(key):
-        return store[key]
+        return chunk_cache.get(store, key)
 
     def setItem(key, value):
         store[key] = value
+        chunk_cache.discard(store, key)
 
     def containsItem(key):
         return key in store
 
-    return {
+    def getItemOrNone(key):
+        try:
+            return chunk_cache.get(store, key)
+        except KeyError:
+            return None
+
+    def getItems(keys: List[str]) -> Dict[str, Optional[bytes]]:
+        # Fetch many chunks in one round trip
+        values = []
+        nbytes = 0
+        for key in keys:
+            value = getItemOrNone(key)
+            values.append(value)
+            if value is not None:
+                nbytes += len(value)
+                if nbytes >= config.rpc_batch_max_bytes:
+                    break
+        return _batch_items(keys, values)
+
+    def containsItems(keys: List[str]) -> List[bool]:
+        return [key in store for key in keys]
+
+    if ENVIRONMENT is not Env.JUPYTERLITE:
+        # Reads, which may compute, decompress or fetch a chunk, run in a
+        # bounded thread pool so that a slow chunk does not stall other
+        # messages on the event loop, and many chunks are served at once
+        sync_get_item = getItem
+        sync_contains_item = containsItem
+        sync_contains_items = containsItems
+
+        async def getItem(key):
+            return await _in_executor(sync_get_item, key)
+
+        async def containsItem(key):
+            return await _in_executor(sync_contains_item, key)
+
+        async def getItems(keys: List[str]) -> Dict[str, Optional[bytes]]:
+            # Read as many keys at once as the pool serves, in order, until
+            # the batch is full
+            values = []
+            nbytes = 0
+            window = config.rpc_concurrency()
+            while len(values) < len(keys) and nbytes < config.rpc_batch_max_bytes:
+                read = await asyncio.gather(*[
+                    _in_executor(getItemOrNone, key)
+                    for key in keys[len(values):len(values) + window]
+                ])
+                values.extend(read)
+                nbytes += sum(len(value) for value in read if value is not None)
+            return _batch_items(keys, values)
+
+        async def containsItems(keys: List[str]) -> List[bool]:
+            return await _in_executor(sync_contains_items, keys)
+
+    encoded = {
         "_rintf": True,
         "_rtype": 'zarr-store',
         "getItem": getItem,
         "setItem": setItem,
         "containsItem": containsItem,
+        "getItems": getItems,
+        "containsItems": containsItems,
     }
+    return encoded
 
 def register_itkwasm_imjoy_codecs():
+    import itkwasm
+    import zarr
+    from imjoy_rpc import api
 
     api.registerCodec({'name': 'itkwasm-image', 'type': itkwasm.Image, 'encoder': encode_itkwasm_image})
     api.registerCodec({'name': 'zarr-store', 'type': zarr.storage.BaseStore, 'encoder': encode_zarr_store})
 
 
 def register_itkwasm_imjoy_codecs_cli(server):
+    import itkwasm
+    import zarr
+
     server.register_codec({'name': 'itkwasm-image', 'type': itkwasm.Image, 'encoder': encode_itkwasm_image})
     server.register_codec({'name': 'zarr-store', 'type': zarr.storage.BaseStore, 'encoder': encode_zarr_store})
@@ -1,50 +1,219 @@
-import itkwasm
-import numpy as np
-import zarr
-from ngff_zarr import to_multiscales, to_ngff_zarr, to_ngff_image, itk_image_to_ngff_image, Methods, NgffImage, Multiscales
-
-import dask
-from .itk import HAVE_ITK
-from .pytorch import HAVE_TORCH
-from .monai import HAVE_MONAI
-from .vtk import HAVE_VTK, vtk_image_to_ngff_image, vtk_polydata_to_vtkjs
-from .xarray import HAVE_XARRAY, HAVE_MULTISCALE_SPATIAL_IMAGE, xarray_data_array_to_numpy, xarray_data_set_to_numpy
+import shutil
+import tempfile
+import weakref
+
+# zarr, dask, ngff_zarr, itkwasm and numpy are imported on first use to keep
+# `import itkwidgets` fast. Types from these packages are registered by
+# import path, and only resolved once the package has been imported.
+from .registry import (
+    image_types,
+    point_set_types,
+    render_types,
+    register_image_type,
+    register_point_set_type,
+    register_render_type,
+)
+from .vtk import vtk_image_to_ngff_image, vtk_polydata_to_vtkjs
+from .xarray import (
+    xarray_data_array_to_numpy,
+    xarray_data_set_to_numpy,
+    xarray_data_array_to_ngff_image,
+    xarray_data_set_to_data_array,
+)
+from ..config import config
 from ..render_types import RenderType
 from .environment import ENVIRONMENT, Env
 
-def _spatial_image_scale_factors(spatial_image, min_length):
-    sizes = dict(spatial_image.sizes)
-    scale_factors = []
-    dims = spatial_image.dims
-    previous = { d: 1 for d in { 'x', 'y', 'z' }.intersection(dims) }
-    while (np.array(list(sizes.values())) > min_length).any():
-        max_size = np.array(list(sizes.values())).max()
-        to_skip = { d: sizes[d] <= max_size / 2 for d in previous.keys() }
-        scale_factor = {}
-        for dim in previous.keys():
-            if to_skip[dim]:
-                scale_factor[dim] = previous[dim]
-                continue
-            scale_factor[dim] = 2 * previous[dim]
-
-            sizes[dim] = int(sizes[dim] / 2)
-        previous = scale_factor
-        scale_factors.append(scale_factor)
-
-    return scale_factors
-
-def _make_multiscale_store():
-    # Todo: for very large images serialize to disk cache
-    # -> create DirectoryStore in cache directory and return as the chunk_store
-    store = zarr.storage.MemoryStore(dimension_separator='/')
+def _make_multiscale_store(nbytes=0):
+    import zarr
+    if nbytes <= config.memory_store_max_bytes:
+        store = zarr.storage.MemoryStore(dimension_separator='/')
+        return store, None
+
+    # Very large images are serialized to a disk cache so that memory use is
+    # bounded by the chunks in flight rather than the size of the image
+    cache_path = tempfile.mkdtemp(prefix='itkwidgets-', dir=config.cache_dir)
+    store = zarr.storage.DirectoryStore(cache_path, dimension_separator='/')
+    # Remove the cache once the store is no longer referenced, e.g. when its
+    # viewer is deleted, or when the interpreter exits
+    weakref.finalize(store, shutil.rmtree, cache_path, ignore_errors=True)
     return store, None
 
-def _get_viewer_image(image, label=False):
+# Source blocks larger than this are not computed whole to serve one chunk
+_max_source_block_bytes = 2**29
+
+def _source_aligned_chunks(ngff_image):
+    # Pick output chunks, near the ngff_zarr defaults, that evenly divide or
+    # are a multiple of the input's dask chunks, so each output chunk is
+    # computed from whole input blocks. Odd chunk sizes are avoided because
+    # ngff_zarr rechunks them before downsampling.
+    default = 128 if 'z' in ngff_image.dims else 256
+    out_chunks = {}
+    for dim, dim_chunks in zip(ngff_image.dims, ngff_image.data.chunks):
+        if dim == 't':
+            out_chunks[dim] = 1
+            continue
+        if dim not in ('x', 'y', 'z'):
+            out_chunks[dim] = default
+            continue
+        source = max(dim_chunks)
+        candidates = [
+            c for c in range(default, default // 2 - 1, -2)
+            if c % source == 0 or source % c == 0
+        ]
+        out_chunks[dim] = candidates[0] if candidates else default
+    return out_chunks
+
+def _ngff_image_to_store(ngff_image, method, cache=True, lazy_source=False):
+    import numpy as np
+    from ngff_zarr import to_multiscales
+    from .._lazy_multiscale_store import LazyMultiscaleStore
+    from .._pyramid_cache import ngff_image_fingerprint, pyramid_cache
+    from .._pyramid_planner import plan_scale_factors
+
+    # Re-displaying unchanged data re-uses the previously generated pyramid.
+    # The fingerprint must be taken before to_multiscales rechunks the data.
+    fingerprint = ngff_image_fingerprint(ngff_image, method) if cache else None
+    if fingerprint is not None:
+        store = pyramid_cache.get(fingerprint)
+        if store is not None:
+            return store
+
+    # Levels are only computed as the viewer requests their chunks. For
+    # inputs that are expensive to compute, such as out-of-core dask
+    # pipelines, chunks follow the input's blocks so that each block is
+    # computed at most once.
+    source_chunks = None
+    chunks = None
+    data = ngff_image.data
+    if lazy_source:
+        block_nbytes = np.prod([max(c) for c in data.chunks]) * data.dtype.itemsize
+        if block_nbytes <= _max_source_block_bytes:
+            source_chunks = data.chunks
+            chunks = _source_aligned_chunks(ngff_image)
+    # Fewer, better shaped levels for anisotropic images
+    scale_factors = plan_scale_factors(
+        ngff_image.dims, data.shape, ngff_image.scale, chunks
+    )
+    backing_store, _ = _make_multiscale_store(data.nbytes)
+    multiscales = to_multiscales(
+        ngff_image, scale_factors=scale_factors, method=method, chunks=chunks, cache=False
+    )
+    store = LazyMultiscaleStore(
+        multiscales,
+        backing_store,
+        derive_levels=True,
+        source_chunks=source_chunks,
+        probe_codecs=not lazy_source,
+        lazy_source=lazy_source,
+    )
+    # Pyramids on disk are not cached, so their directory is removed as soon
+    # as their viewer is deleted
+    if fingerprint is not None and store.in_memory:
+        pyramid_cache.put(fingerprint, store)
+    return store
+
+def _multiscales_to_store(multiscales):
+    from .._lazy_multiscale_store import LazyMultiscaleStore
+    backing_store, _ = _make_multiscale_store(multiscales.images[0].data.nbytes)
+    return LazyMultiscaleStore(multiscales, backing_store)
+
+def _build_viewer_image(store, max_workers=None):
+    from .._chunk_cache import chunk_cache
+    from .._lazy_multiscale_store import LazyMultiscaleStore
+    # User stores, e.g. zarr groups, may have been rewritten since their
+    # chunks were cached when they were last displayed
+    chunk_cache.discard_store(store)
+    # Compute the whole pyramid in the background, coarsest level first, in
+    # parallel, ahead of the viewer's requests. There are no threads in
+    # pyodide, where chunks are only computed on request.
+    if not isinstance(store, LazyMultiscaleStore) or ENVIRONMENT is Env.JUPYTERLITE:
+        return
+    # Inputs that are expensive to compute, e.g. dask pipelines, are only
+    # built ahead of the viewer when max_workers is passed explicitly
+    if max_workers is None and (store.lazy_source or not config.background_build):
+        return
+    store.start_build(max_workers)
+
+def _array_render_type(data):
+    # Nx2 and Nx3 arrays are point positions
+    if data.ndim == 2 and data.shape[1] < 4:
+        return RenderType.POINT_SET
+    return RenderType.IMAGE
+
+def _zarr_group_to_store(group, method):
     # NGFF Zarr
-    if isinstance(image, zarr.Group) and 'multiscales' in image.attrs:
-        return image.store
+    if 'multiscales' in group.attrs:
+        return group.store
+    raise RuntimeError("Could not process the viewer image")
+
+def _multiscale_spatial_image_to_store(image, method):
+    store, _ = _make_multiscale_store(image.nbytes)
+    image.to_zarr(store, compute=True)
+    return store
+
+def _itk_image_to_store(image, method):
+    from ngff_zarr import itk_image_to_ngff_image
+    ngff_image = itk_image_to_ngff_image(image)
+    return _ngff_image_to_store(ngff_image, method)
+
+def _vtk_image_to_store(image, method):
+    ngff_image = vtk_image_to_ngff_image(image)
+    return _ngff_image_to_store(ngff_image, method)
+
+def _dask_array_to_store(image, method):
+    from ngff_zarr import to_ngff_image
+    ngff_image = to_ngff_image(image)
+    return _ngff_image_to_store(ngff_image, method, lazy_source=True)
+
+def _zarr_array_to_store(image, method):
+    from ngff_zarr import to_ngff_image
+    ngff_image = to_ngff_image(image)
+    # The dask token of a zarr.Array does not change with its contents
+    return _ngff_image_to_store(ngff_image, method, cache=False, lazy_source=True)
+
+def _monai_meta_tensor_to_store(image, method):
+    from monai.data import metatensor_to_itk_image
+    itk_image = metatensor_to_itk_image(image)
+    return _itk_image_to_store(itk_image, method)
+
+def _torch_tensor_to_store(image, method):
+    from ngff_zarr import to_ngff_image
+    ngff_image = to_ngff_image(image.numpy())
+    return _ngff_image_to_store(ngff_image, method)
+
+def _xarray_to_store(image, method):
+    # dims, coords and chunks are kept, and dask-backed data stays lazy
+    if hasattr(image, 'data_vars'):
+        image = xarray_data_set_to_data_array(image)
+    ngff_image = xarray_data_array_to_ngff_image(image)
+    return _ngff_image_to_store(ngff_image, method, lazy_source=image.chunks is not None)
+
+def _numpy_array_to_store(image, method):
+    from ngff_zarr import to_ngff_image
+    ngff_image = to_ngff_image(image)
+    return _ngff_image_to_store(ngff_image, method)
+
+register_image_type('zarr.hierarchy.Group', _zarr_group_to_store)
+register_image_type('ngff_zarr.ngff_image.NgffImage', lambda image, method: _ngff_image_to_store(image, method))
+register_image_type('ngff_zarr.multiscales.Multiscales', lambda image, method: _multiscales_to_store(image))
+register_image_type('zarr.storage.BaseStore', lambda image, method: image)
+register_image_type('multiscale_spatial_image.MultiscaleSpatialImage', _multiscale_spatial_image_to_store)
+register_image_type('itkwasm.image.Image', _itk_image_to_store)
+register_image_type('itk.Image', _itk_image_to_store)
+register_image_type('itk.VectorImage', _itk_image_to_store)
+register_image_type('vtkmodules.vtkCommonDataModel.vtkImageData', _vtk_image_to_store)
+register_image_type('dask.array.core.Array', _dask_array_to_store, render_type=_array_render_type)
+register_image_type('zarr.core.Array', _zarr_array_to_store)
+register_image_type('monai.data.MetaTensor', _monai_meta_tensor_to_store, render_type=_array_render_type)
+register_image_type('torch.Tensor', _torch_tensor_to_store, render_type=_array_render_type)
+register_image_type('xarray.DataArray', _xarray_to_store, render_type=_array_render_type)
+register_image_type('xarray.Dataset', _xarray_to_store)
+register_image_type('numpy.ndarray', _numpy_array_to_store, render_type=_array_render_type)
+
+def _get_viewer_image(image, label=False):
+    from ngff_zarr import Methods, NgffImage, Multiscales
 
-    min_length = 64
     # ITKWASM methods are currently only async in pyodide
     if ENVIRONMENT is Env.JUPYTERLITE:
         if label:
@@ -57,130 +226,41 @@ def _get_viewer_image(image, label=False):
         else:
             method = Methods.ITKWASM_GAUSSIAN
 
-    store, chunk_store = _make_multiscale_store()
-
-    if isinstance(image, NgffImage):
-        multiscales = to_multiscales(image, method=method)
-        to_ngff_zarr(store, multiscales, chunk_store=chunk_store)
-        return store
-
-    if isinstance(image, Multiscales):
-        to_ngff_zarr(store, image, chunk_store=chunk_store)
-        return store
-
-    if isinstance(image, zarr.storage.BaseStore):
-        return image
+    converter = image_types.lookup(image)
+    if converter is None:
+        raise RuntimeError("Could not process the viewer image")
+    result = converter(image, method)
+    if isinstance(result, (NgffImage, Multiscales)) and result is not image:
+        # Third-party converters may return an intermediate image
+        return _get_viewer_image(result, label=label)
+    return result
 
-    if HAVE_MULTISCALE_SPATIAL_IMAGE:
-        from multiscale_spatial_image import MultiscaleSpatialImage
-        if isinstance(image, MultiscaleSpatialImage):
-            image.to_zarr(store, compute=True)
-            return store
-
-    if isinstance(image, itkwasm.Image):
-        ngff_image = itk_image_to_ngff_image(image)
-        multiscales = to_multiscales(ngff_image, method=method)
-        to_ngff_zarr(store, multiscales, chunk_store=chunk_store)
-        return store
-
-    if HAVE_ITK:
-        import itk
-        if isinstance(image, itk.Image) or isinstance(image, itk.VectorImage):
-            ngff_image = itk_image_to_ngff_image(image)
-            multiscales = to_multiscales(ngff_image, method=method)
-            to_ngff_zarr(store, multiscales, chunk_store=chunk_store)
-            return store
 
-    if HAVE_VTK:
-        import vtk
-        if isinstance(image, vtk.vtkImageData):
-            ngff_image = vtk_image_to_ngff_image(image)
-            multiscales = to_multiscales(ngff_image, method=method)
-            to_ngff_zarr(store, multiscales, chunk_store=chunk_store)
-            return store
+def _vtk_polydata_to_point_set(point_set):
+    return vtk_polydata_to_vtkjs(point_set)
 
-    if isinstance(image, dask.array.core.Array):
-        ngff_image = to_ngff_image(image)
-        multiscales = to_multiscales(ngff_image, method=method)
-        to_ngff_zarr(store, multiscales, chunk_store=chunk_store)
-        return store
-
-    if isinstance(image, zarr.Array):
-        ngff_image = to_ngff_image(image)
-        multiscales = to_multiscales(ngff_image, method=method)
-        to_ngff_zarr(store, multiscales, chunk_store=chunk_store)
-        return store
-
-    if HAVE_MONAI:
-        from monai.data import MetaTensor, metatensor_to_itk_image
-        if isinstance(image, MetaTensor):
-            itk_image = metatensor_to_itk_image(image)
-            ngff_image = itk_image_to_ngff_image(itk_image)
-            multiscales = to_multiscales(ngff_image, method=method)
-            to_ngff_zarr(store, multiscales, chunk_store=chunk_store)
-            return store
+def _itk_point_set_to_point_set(point_set):
+    import itk
+    return itk.array_from_vector_container(point_set.GetPoints())
 
-    if HAVE_TORCH:
-        import torch
-        if isinstance(image, torch.Tensor):
-            ngff_image = to_ngff_image(image.numpy())
-            multiscales = to_multiscales(ngff_image, method=method)
-            to_ngff_zarr(store, multiscales, chunk_store=chunk_store)
-            return store
-
-    # Todo: preserve dask Array, if present, check if dims are NGFF -> use dims, coords
-    # Check if coords are uniform, if not, resample
-    if HAVE_XARRAY:
-        import xarray as xr
-        if isinstance(image, xr.DataArray):
-            # if HAVE_MULTISCALE_SPATIAL_IMAGE:
-            #     from spatial_image import is_spatial_image
-            #     if is_spatial_image(image):
-            #         from multiscale_spatial_image import to_multiscale
-            #         scale_factors = _spatial_image_scale_factors(image, min_length)
-            #         multiscale = to_multiscale(image, scale_factors, method=method)
-            #         return _make_multiscale_store(multiscale)
-
-            return xarray_data_array_to_numpy(image)
-        if isinstance(image, xr.Dataset):
-            # da = image[next(iter(image.variables.keys()))]
-            # if is_spatial_image(da):
-            #     scale_factors = _spatial_image_scale_factors(da, min_length)
-            #     multiscale = to_multiscale(da, scale_factors, method=method)
-            #     return _make_multiscale_store(multiscale)
-            return xarray_data_set_to_numpy(image)
-
-    if isinstance(image, np.ndarray):
-        ngff_image = to_ngff_image(image)
-        multiscales = to_multiscales(ngff_image, method=method)
-        to_ngff_zarr(store, multiscales, chunk_store=chunk_store)
-        return store
-
-    raise RuntimeError("Could not process the viewer image")
+def _xarray_to_point_set(point_set):
+    if hasattr(point_set, 'data_vars'):
+        return xarray_data_set_to_numpy(point_set)
+    return xarray_data_array_to_numpy(point_set)
 
+register_point_set_type('itkwasm.point_set.PointSet', lambda point_set: point_set)
+register_point_set_type('vtkmodules.vtkCommonDataModel.vtkPolyData', _vtk_polydata_to_point_set)
+register_point_set_type('dask.array.core.Array', lambda point_set: point_set.compute(), render_type=None)
+register_point_set_type('torch.Tensor', lambda point_set: point_set.numpy(), render_type=None)
+register_point_set_type('xarray.DataArray', _xarray_to_point_set, render_type=None)
+register_point_set_type('xarray.Dataset', _xarray_to_point_set, render_type=None)
+register_point_set_type('itk.PointSet', _itk_point_set_to_point_set)
 
 def _get_viewer_point_set(point_set):
-    if HAVE_VTK:
-        import vtk
-        if isinstance(point_set, vtk.vtkPolyData):
-            return vtk_polydata_to_vtkjs(point_set)
-    if isinstance(point_set, dask.array.core.Array):
-        return np.asarray(point_set)
-    if HAVE_TORCH:
-        import torch
-        if isinstance(point_set, torch.Tensor):
-            return point_set.numpy()
-    if HAVE_XARRAY:
-        import xarray as xr
-        if isinstance(point_set, xr.DataArray):
-            return xarray_data_array_to_numpy(point_set)
-        if isinstance(point_set, xr.Dataset):
-            return xarray_data_set_to_numpy(point_set)
-    if HAVE_ITK:
-        import itk
-        if isinstance(point_set, itk.PointSet):
-            return itk.array_from_vector_container(point_set.GetPoints())
-    return point_set
+    converter = point_set_types.lookup(point_set)
+    if converter is None:
+        return point_set
+    return converter(point_set)
 
 
 def _detect_render_type(data, input_type) -> RenderType:
@@ -190,65 +270,7 @@ def _detect_render_type(data, input_type) -> RenderType:
         return RenderType.IMAGE
     elif input_type == 'point_set':
         return RenderType.POINT_SET
-    if isinstance(data, itkwasm.Image):
-        return RenderType.IMAGE
-    elif isinstance(data, NgffImage):
-        return RenderType.IMAGE
-    elif isinstance(data, Multiscales):
-        return RenderType.IMAGE
-    elif isinstance(data, itkwasm.PointSet):
-        return RenderType.POINT_SET
-    elif isinstance(data, (zarr.Array, zarr.Group)):
-        # For now assume zarr.Group is an image
-        # In the future, once NGFF supports point sets fully
-        # We may need to do more introspection
-        return RenderType.IMAGE
-    elif isinstance(data, np.ndarray):
-        if data.ndim == 2 and data.shape[1] < 4:
-            return RenderType.POINT_SET
-        else:
-            return RenderType.IMAGE
-    elif isinstance(data, zarr.storage.BaseStore):
-        return RenderType.IMAGE
-    elif HAVE_ITK:
-        import itk
-        if isinstance(data, itk.Image):
-            return RenderType.IMAGE
-        elif isinstance(data, itk.VectorImage):
-            return RenderType.IMAGE
-        elif isinstance(data, itk.PointSet):
-            return RenderType.POINT_SET
-    if HAVE_MULTISCALE_SPATIAL_IMAGE:
-        from multiscale_spatial_image import MultiscaleSpatialImage
-        if isinstance(data, MultiscaleSpatialImage):
-            return RenderType.IMAGE
-    if HAVE_VTK:
-        import vtk
-        if isinstance(data, vtk.vtkImageData):
-            return RenderType.IMAGE
-        elif isinstance(data, vtk.vtkPolyData):
-            return RenderType.POINT_SET
-    if isinstance(data, dask.array.core.Array):
-        if data.ndim ==2 and data.shape[1] < 4:
-            return RenderType.POINT_SET
-        else:
-            return RenderType.IMAGE
-    if HAVE_TORCH:
-        import torch
-        if isinstance(data, torch.Tensor):
-            if data.dim == 2 and data.shape[1] < 4:
-                return RenderType.POINT_SET
-            else:
-                return RenderType.IMAGE
-    if HAVE_XARRAY:
-        import xarray as xr
-        if isinstance(data, xr.DataArray):
-            if data.dims == 2 and data.shape[1] < 4:
-                return RenderType.POINT_SET
-            else:
-                return RenderType.IMAGE
-        if isinstance(data, xr.Dataset):
-            if data.dims == 2 and data.shape[1] < 4:
-                return RenderType.POINT_SET
-            else:
-                return RenderType.IMAGE
+    render_type = render_types.lookup(data)
+    if callable(render_type):
+        return render_type(data)
+    return render_type
@@ -1,4 +1,5 @@
 from enum import Enum
+from functools import lru_cache
 from importlib import import_module
 from packaging import version
 import importlib_metadata
@@ -13,12 +14,17 @@ class Env(Enum):
     COLAB = 'colab'
 
 
+@lru_cache(maxsize=None)
 def find_env():
     try:
         from google.colab import files
         return Env.COLAB
     except:
         try:
+            # A running kernel has already imported IPython. Do not pay for
+            # importing it only to find that there is no kernel.
+            if 'IPython' not in sys.modules:
+                raise RuntimeError('Not running in IPython')
             from IPython import get_ipython
             parent_header = get_ipython().parent_header
             username = parent_header['header']['username']
@@ -0,0 +1,185 @@
+import sys
+import threading
+import warnings
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import importlib_metadata
+
+from ..render_types import RenderType
+
+# Third-party packages add support for their data types with an entry point
+# in this group that refers to a function called without arguments, which in
+# turn calls register_image_type, register_point_set_type and
+# register_render_type. For example, in pyproject.toml:
+#
+#   [project.entry-points."itkwidgets.integrations"]
+#   mypackage = "mypackage.itkwidgets:register"
+ENTRY_POINT_GROUP = 'itkwidgets.integrations'
+
+# A type, or the import path of a type as a string, e.g. 'torch.Tensor'.
+# Import paths are only resolved once their module has been imported, so
+# registering a type does not import the package that provides it.
+TypeKey = Union[type, str]
+
+
+class TypeRegistry:
+    """Map input data types to handlers.
+
+    Lookups walk the method resolution order of the data's concrete type, so
+    the most specific registered type wins, and the result is cached per
+    concrete type.
+    """
+
+    def __init__(self) -> None:
+        self._entries: List[Tuple[TypeKey, Any]] = []
+        self._cache: Dict[type, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, key: TypeKey, handler: Any) -> None:
+        """Register a handler for a type and its subclasses. A handler
+        registered later for the same type replaces the earlier one.
+
+        :param key: The type, or its import path, e.g. 'vtk.vtkImageData'
+        :type key:  type | str
+        :param handler: The handler for the type
+        :type handler:  Any
+        """
+        with self._lock:
+            self._entries = [(k, h) for k, h in self._entries if k != key]
+            self._entries.append((key, handler))
+            self._cache.clear()
+
+    @staticmethod
+    def _resolve(key: TypeKey) -> Optional[Any]:
+        if not isinstance(key, str):
+            return key
+        module_name, _, attribute = key.rpartition('.')
+        module = sys.modules.get(module_name)
+        if module is None:
+            # The data cannot be an instance of a type that was never imported
+            return None
+        return getattr(module, attribute, None)
+
+    def lookup(self, data: Any) -> Optional[Any]:
+        """Find the handler for the data.
+
+        :param data: Input data
+        :type data:  Any
+        :return: The handler registered for the data's type, or None
+        :rtype:  Any | None
+        """
+        _load_entry_points()
+        data_type = type(data)
+        try:
+            return self._cache[data_type]
+        except KeyError:
+            pass
+
+        with self._lock:
+            entries = list(self._entries)
+        resolved = [(self._resolve(key), handler) for key, handler in entries]
+        handler = None
+        by_type = {t: h for t, h in resolved if isinstance(t, type)}
+        for cls in data_type.__mro__:
+            if cls in by_type:
+                handler = by_type[cls]
+                break
+        else:
+            # Some registered "types", such as itk's wrapped templates, are
+            # not classes in the MRO but do support isinstance
+            for t, h in resolved:
+                if t is None or isinstance(t, type):
+                    continue
+                try:
+                    if isinstance(data, t):
+                        handler = h
+                        break
+                except TypeError:
+                    continue
+
+        # Do not cache misses for types from modules that may be imported later
+        with self._lock:
+            if handler is not None or all(self._resolve(k) is not None for k, _ in entries):
+                self._cache[data_type] = handler
+        return handler
+
+
+image_types = TypeRegistry()
+point_set_types = TypeRegistry()
+render_types = TypeRegistry()
+
+
+def register_image_type(
+    key: TypeKey,
+    converter: Callable,
+    render_type: Union[RenderType, Callable, None] = RenderType.IMAGE,
+) -> None:
+    """Add support for an image type.
+
+    :param key: The image type, or its import path, e.g. 'torch.Tensor'
+    :type key:  type | str
+    :param converter: Called with the image and the ngff_zarr.Methods to use
+    for downsampling. Returns a zarr store, or an ngff_zarr NgffImage or
+    Multiscales, which are converted in turn.
+    :type converter:  Callable
+    :param render_type: How the type is rendered when it is passed as
+    generic `data`, or a callable that returns the RenderType given the data.
+    None does not register a render type. default: RenderType.IMAGE
+    :type render_type:  RenderType | Callable | None
+    """
+    image_types.register(key, converter)
+    if render_type is not None:
+        render_types.register(key, render_type)
+
+
+def register_point_set_type(
+    key: TypeKey,
+    converter: Callable,
+    render_type: Union[RenderType, Callable, None] = RenderType.POINT_SET,
+) -> None:
+    """Add support for a point set type.
+
+    :param key: The point set type, or its import path
+    :type key:  type | str
+    :param converter: Called with the point set. Returns an Nx3 array of point
+    positions or an itkwasm.PointSet.
+    :type converter:  Callable
+    :param render_type: How the type is rendered when it is passed as
+    generic `data`, or a callable that returns the RenderType given the data.
+    None does not register a render type. default: RenderType.POINT_SET
+    :type render_type:  RenderType | Callable | None
+    """
+    point_set_types.register(key, converter)
+    if render_type is not None:
+        render_types.register(key, render_type)
+
+
+def register_render_type(key: TypeKey, render_type: Union[RenderType, Callable]) -> None:
+    """Set how a type is rendered when it is passed as generic `data`.
+
+    :param key: The data type, or its import path
+    :type key:  type | str
+    :param render_type: The RenderType, or a callable that returns the
+    RenderType given the data
+    :type render_type:  RenderType | Callable
+    """
+    render_types.register(key, render_type)
+
+
+_entry_points_loaded = False
+_entry_points_lock = threading.Lock()
+
+
+def _load_entry_points() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    with _entry_points_lock:
+        if _entry_points_loaded:
+            return
+        _entry_points_loaded = True
+        for entry_point in importlib_metadata.entry_points(group=ENTRY_POINT_GROUP):
+            try:
+                entry_point.load()()
+            except Exception as e:
+                warnings.warn(f'Could not load itkwidgets integration {entry_point.name}: {e}')
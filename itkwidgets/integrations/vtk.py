@@ -7,10 +7,9 @@ try:
 except importlib_metadata.PackageNotFoundError:
     pass
 
-from ngff_zarr import to_ngff_image
-
 
 def vtk_image_to_ngff_image(image):
+    from ngff_zarr import to_ngff_image
     from vtk.util.numpy_support import vtk_to_numpy
     array = vtk_to_numpy(image.GetPointData().GetScalars())
     dimensions = list(image.GetDimensions())
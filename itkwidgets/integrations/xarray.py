@@ -19,3 +19,55 @@ def xarray_data_array_to_numpy(data_array):
 
 def xarray_data_set_to_numpy(data_set):
     return xarray_data_array_to_numpy(data_set.to_array(name='Dataset'))
+
+_ngff_dims = ('t', 'c', 'z', 'y', 'x')
+
+def xarray_data_array_to_ngff_image(data_array):
+    import numpy as np
+    from ngff_zarr import to_ngff_image
+
+    # The underlying array, dask or numpy, is used as is: no copy is made
+    # and dask chunks are preserved
+    data = data_array.data
+    dims = tuple(str(d) for d in data_array.dims)
+    if not set(dims).issubset(_ngff_dims) or len(set(dims)) != len(dims):
+        # Fall back to the default dims for the dimensionality
+        return to_ngff_image(data, name=str(data_array.name or 'image'))
+
+    spatial_dims = [d for d in dims if d in ('z', 'y', 'x')]
+    scale = {d: 1.0 for d in spatial_dims}
+    translation = {d: 0.0 for d in spatial_dims}
+    axes_units = {}
+    for dim in spatial_dims:
+        if dim not in data_array.coords:
+            continue
+        coord = data_array.coords[dim]
+        values = coord.values
+        if values.ndim != 1 or not len(values) or not np.issubdtype(values.dtype, np.number):
+            continue
+        translation[dim] = float(values[0])
+        # Non-uniform coordinates are approximated by their mean spacing
+        if len(values) > 1:
+            scale[dim] = float(values[-1] - values[0]) / (len(values) - 1)
+        units = coord.attrs.get('units')
+        if units:
+            axes_units[dim] = units
+
+    return to_ngff_image(
+        data,
+        dims=dims,
+        scale=scale,
+        translation=translation,
+        name=str(data_array.name or 'image'),
+        axes_units=axes_units or None,
+    )
+
+def xarray_data_set_to_data_array(data_set):
+    # Only the selected variable is loaded. Select a variable with
+    # data_set[['name']]; otherwise the first data variable with spatial
+    # dims is used.
+    data_arrays = [data_set[name] for name in data_set.data_vars]
+    if not data_arrays:
+        raise ValueError('Dataset has no data variables')
+    spatial = [da for da in data_arrays if {'x', 'y'}.issubset(map(str, da.dims))]
+    return (spatial or data_arrays)[0]
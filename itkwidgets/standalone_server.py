@@ -18,10 +18,11 @@ import imjoy_rpc
 from imjoy_rpc.hypha import connect_to_server_sync
 from itkwidgets.standalone.config import SERVER_HOST, SERVER_PORT, VIEWER_HTML
 from itkwidgets.imjoy import register_itkwasm_imjoy_codecs_cli
+from itkwidgets._request_queue import send_batch
 from itkwidgets._initialization_params import (
     build_config,
     build_init_data,
-    init_params_dict,
+    init_params_methods,
     DATA_OPTIONS,
 )
 from itkwidgets.viewer import view
@@ -108,16 +109,18 @@ def read_files(viewer_options):
 
 
 class ViewerReady:
-    def __init__(self, viewer_options, init_params_dict):
+    def __init__(self, viewer_options, init_params_methods):
         self.init_viewer_kwargs = vars(viewer_options)
-        self.init_params_dict = init_params_dict
+        self.init_params_methods = init_params_methods
         self.event = threading.Event()
 
     async def on_ready(self, itk_viewer):
-        settings = self.init_params_dict(itk_viewer)
-        for key, value in self.init_viewer_kwargs.items():
-            if key in settings.keys() and value is not None:
-                settings[key](value)
+        settings = self.init_params_methods()
+        send_batch(itk_viewer, [
+            (settings[key], (value,), {})
+            for key, value in self.init_viewer_kwargs.items()
+            if key in settings.keys() and value is not None
+        ])
 
         self.event.set()
 
@@ -146,7 +149,7 @@ def start_viewer(server_url, viewer_options):
     register_itkwasm_imjoy_codecs_cli(server)
 
     input_obj = input_dict(viewer_options)
-    viewer_ready = ViewerReady(viewer_options, init_params_dict)
+    viewer_ready = ViewerReady(viewer_options, init_params_methods)
     server.register_service(
         {
             "name": "parsed_data",
@@ -2,34 +2,39 @@ from __future__ import annotations
 
 import asyncio
 import functools
-import queue
-import threading
-import numpy as np
+from contextlib import contextmanager
 from imjoy_rpc import api
 from inspect import isawaitable
-from typing import Callable, Dict, List, Union, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Union, Tuple
 from IPython.display import display, HTML
-from IPython.lib import backgroundjobs as bg
-from ngff_zarr import from_ngff_zarr, to_ngff_image, Multiscales, NgffImage
 import uuid
+import warnings
 
 from ._method_types import deferred_methods
-from ._type_aliases import Style, Image, PointSet, CroppingPlanes, Points2d
 from ._initialization_params import (
-    init_params_dict,
+    init_params_methods,
+    state_params,
     build_config,
     parse_input_data,
     build_init_data,
     defer_for_data_render,
 )
 from .imjoy import register_itkwasm_imjoy_codecs
-from .integrations import _detect_render_type, _get_viewer_image, _get_viewer_point_set
+from .integrations import _build_viewer_image, _detect_render_type, _get_viewer_image, _get_viewer_point_set
+from .config import config as itkwidgets_config
 from .integrations.environment import ENVIRONMENT, Env
+from ._roi import roi_image
+from ._request_queue import CoalescingQueue, RequestDebouncer, scheduler, send_batch
 from .render_types import RenderType
 from .viewer_config import ITK_VIEWER_SRC
 from imjoy_rpc import register_default_codecs
 
+if TYPE_CHECKING:
+    from ngff_zarr import Multiscales, NgffImage
+    from ._type_aliases import Style, Image, PointSet, CroppingPlanes, Points2d
+
 __all__ = [
+    "AsyncViewer",
     "Viewer",
     "view",
 ]
@@ -70,9 +75,6 @@ class ViewerRPC:
         self.parent = parent
         if ENVIRONMENT is not Env.JUPYTERLITE:
             _cell_watcher and _cell_watcher.add_viewer(self.parent)
-            if ENVIRONMENT is not Env.HYPHA:
-                self.viewer_event = threading.Event()
-                self.data_event = threading.Event()
 
     async def setup(self) -> None:
         pass
@@ -84,6 +86,8 @@ class ViewerRPC:
         config = build_config(ui)
 
         if ENVIRONMENT is not Env.HYPHA:
+            # Create the viewer once there is a coarse level to render
+            await self.wait_for_coarse_levels()
             itk_viewer = await api.createWindow(
                 name=f"itkwidgets viewer {_viewer_count}",
                 type="itk-vtk-viewer",
@@ -108,7 +112,7 @@ class ViewerRPC:
                 if not defer_for_data_render(self.init_data):
                     # Once the viewer has been created any queued requests can be run
                     _cell_watcher.update_viewer_status(self.parent, True)
-                asyncio.get_running_loop().call_soon_threadsafe(self.viewer_event.set)
+                scheduler.set_viewer_ready(self.parent)
 
             # Wait and then update the screenshot in case rendered level changed
             await asyncio.sleep(10)
@@ -117,16 +121,39 @@ class ViewerRPC:
             # screenshot is updated when the user requests
             itk_viewer.registerEventListener('screenshotTaken', self.update_screenshot)
 
+    async def wait_for_coarse_levels(self) -> None:
+        """Wait for the coarsest level of the image pyramids in the initial
+        data, which are built in the background, for at most
+        config.coarse_level_timeout seconds.
+        """
+        if ENVIRONMENT is Env.JUPYTERLITE or not self.init_data:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + itkwidgets_config.coarse_level_timeout
+        for store in self.init_data.values():
+            wait_for_level = getattr(store, 'wait_for_level', None)
+            if wait_for_level is None:
+                continue
+            timeout = max(deadline - loop.time(), 0)
+            try:
+                await loop.run_in_executor(None, wait_for_level, -1, timeout)
+            except RuntimeError as e:
+                # Chunks are still computed as the viewer requests them
+                warnings.warn(f'{e}: {e.__cause__!r}')
+
     def set_default_ui_values(self, itk_viewer: dict) -> None:
         """Set any UI values passed in on initialization.
 
         :param itk_viewer: The ImJoy plugin API to use
         :type itk_viewer:  dict
         """
-        settings = init_params_dict(itk_viewer)
-        for key, value in self._init_viewer_kwargs.items():
-            if key in settings.keys():
-                settings[key](value)
+        settings = init_params_methods()
+        requests = [
+            (settings[key], (value,), {})
+            for key, value in self._init_viewer_kwargs.items()
+            if key in settings.keys()
+        ]
+        send_batch(itk_viewer, requests)
 
     async def create_screenshot(self) -> None:
         """Grab a screenshot of the current Viewer and embed it in the
@@ -161,15 +188,14 @@ class ViewerRPC:
             _cell_watcher.update_viewer_status(self.parent, True)
 
     def set_event(self, event_data: str) -> None:
-        """Set the event in the background thread to indicate that the plugin
-        API is available so that queued setter requests are processed.
+        """Mark the data as rendered so that the scheduler sends the queued
+        deferred requests.
 
         :param event_data: The name of the image that has been rendered
         :type event_data:  string
         """
-        if not self.data_event.is_set():
-            # Once the data has been set the deferred queue requests can be run
-            asyncio.get_running_loop().call_soon_threadsafe(self.data_event.set)
+        # Once the data has been set the deferred queue requests can be run
+        scheduler.set_data_ready(self.parent)
         if ENVIRONMENT is not Env.HYPHA:
             self.update_viewer_status()
 
@@ -182,13 +208,18 @@ class Viewer:
         ui_collapsed: bool = True,
         rotate: bool = False,
         ui: bool = "pydata-sphinx",
+        max_workers: int = None,
         **add_data_kwargs,
     ) -> None:
         """Create a viewer."""
         self.stores = {}
+        self._multiscales = {}
         self.name = self.__str__()
+        self.max_workers = max_workers
+        self._debouncer = RequestDebouncer(self._send_request)
+        self._batch = None
         input_data = parse_input_data(add_data_kwargs)
-        data = build_init_data(input_data, self.stores)
+        data = build_init_data(input_data, self.stores, max_workers)
         if compare := input_data.get('compare'):
             data['compare'] = compare
         if ENVIRONMENT is not Env.HYPHA:
@@ -204,16 +235,15 @@ class Viewer:
             self.workspace = self.server.config.workspace
 
     def _setup_queueing(self) -> None:
-        """Create a background thread and two queues of requests: one will hold
-        requests that can be run as soon as the plugin API is available, the
-        deferred queue will hold requests that need the data to be rendered
-        before they are applied. Background requests will not return any
-        results.
+        """Create two queues of requests, sent by the shared scheduler: one
+        will hold requests that can be run as soon as the plugin API is
+        available, the deferred queue will hold requests that need the data
+        to be rendered before they are applied. Queued requests will not
+        return any results.
         """
-        self.bg_jobs = bg.BackgroundJobManager()
-        self.queue = queue.Queue()
-        self.deferred_queue = queue.Queue()
-        self.bg_thread = self.bg_jobs.new(self.queue_worker)
+        self._requests = scheduler.register(self.name, self._send_request)
+        self.queue = self._requests.queue
+        self.deferred_queue = self._requests.deferred_queue
 
     @property
     def loop(self) -> asyncio.BaseEventLoop:
@@ -246,35 +276,6 @@ class Viewer:
             return self.viewer_rpc.itk_viewer
         return self._itk_viewer
 
-    async def run_queued_requests(self) -> None:
-        """Once the plugin API is available and the viewer_event is set, run
-        all requests queued for the background thread that do not require the
-        data to be available.
-        Once the data has been rendered process any deferred requests.
-        """
-        def _run_queued_requests(queue):
-            method_name, args, kwargs = queue.get()
-            fn = getattr(self.itk_viewer, method_name)
-            self.loop.call_soon_threadsafe(asyncio.ensure_future, fn(*args, **kwargs))
-
-        # Wait for the viewer to be created
-        self.viewer_rpc.viewer_event.wait()
-        while self.queue.qsize():
-            _run_queued_requests(self.queue)
-        # Wait for the data to be set
-        self.viewer_rpc.data_event.wait()
-        while self.deferred_queue.qsize():
-            _run_queued_requests(self.deferred_queue)
-
-    def queue_worker(self) -> None:
-        """Create a new event loop in the background thread and run until all
-        queued tasks are complete.
-        """
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        task = loop.create_task(self.run_queued_requests())
-        loop.run_until_complete(task)
-
     def call_getter(self, future: asyncio.Future) -> None:
         """Create a future for requests that expect a response and set the
         callback to update the CellWatcher once resolved.
@@ -285,26 +286,118 @@ class Viewer:
         """
         global _cell_watcher
         name = uuid.uuid4()
-        _cell_watcher.results[name] = future
+        _cell_watcher.add_result(name, future)
         future.add_done_callback(functools.partial(_cell_watcher._callback, name))
 
     def queue_request(self, method: Callable, *args, **kwargs) -> None:
         """Determine if a request should be run immeditately, queued to run
         once the plugin API is avaialable, or queued to run once the data has
-        been rendered.
+        been rendered. Repeated setter calls are coalesced while queued and
+        debounced once the viewer is available, so only the latest value is
+        sent.
 
         :param method:  Function to either call or queue
         :type method:   Callable
         """
-        if (
+        if self._batch is not None:
+            self._batch.put((method, args, kwargs))
+        elif (
             ENVIRONMENT is Env.JUPYTERLITE or ENVIRONMENT is Env.HYPHA
         ) or self.has_viewer:
-            fn = getattr(self.itk_viewer, method)
-            fn(*args, **kwargs)
+            self._debouncer.request(method, args, kwargs)
         elif method in deferred_methods():
             self.deferred_queue.put((method, args, kwargs))
+            scheduler.notify()
         else:
             self.queue.put((method, args, kwargs))
+            scheduler.notify()
+
+    @contextmanager
+    def batch(self) -> Iterator[Viewer]:
+        """Collect the setter calls made within the block and send them to
+        the viewer when the block exits. Repeated calls to the same setter
+        are coalesced, so only the latest value is sent. The remaining
+        requests are still sent, and applied by the viewer, one at a time.
+        Getters called within the block return the values from before the
+        block.
+
+            with viewer.batch():
+                viewer.set_image_color_map('viridis')
+                viewer.set_image_color_range([0, 255])
+                viewer.set_z_slice(42)
+
+        :return: The viewer
+        :rtype:  Viewer
+        """
+        if self._batch is not None:
+            # Nested blocks are sent with the outermost
+            yield self
+            return
+        self._batch = CoalescingQueue()
+        try:
+            yield self
+        finally:
+            requests, self._batch = self._batch.drain(), None
+            if (
+                ENVIRONMENT is Env.JUPYTERLITE or ENVIRONMENT is Env.HYPHA
+            ) or self.has_viewer:
+                self._debouncer.flush()
+                send_batch(self.itk_viewer, requests)
+            else:
+                for method, args, kwargs in requests:
+                    self.queue_request(method, *args, **kwargs)
+
+    async def _get_state(self, getter: str, *args, select: Callable = None):
+        """Fetch the value of a viewer getter.
+
+        :param getter: Name of the viewer API getter, e.g. 'getXSlice'
+        :type getter:  str
+        :param select: Applied to the value before it is returned
+        :type select:  Callable, optional
+        :return: The value
+        :rtype:  Any
+        """
+        value = await self._call_viewer(getter, *args)
+        return value if select is None else select(value)
+
+    async def _call_viewer(self, method: str, *args):
+        """Call a viewer API method once the viewer is ready for it, i.e.
+        created, and for methods that need it, with its data rendered.
+
+        :param method: Name of the viewer API method
+        :type method:  str
+        :return: The result of the call
+        :rtype:  Any
+        """
+        if hasattr(self, '_requests'):
+            # Notebook viewers that are created asynchronously
+            await scheduler.wait_ready(self.name)
+            if method in deferred_methods() and self.stores:
+                await scheduler.wait_ready(self.name, data=True)
+        return await getattr(self.itk_viewer, method)(*args)
+
+    def _get_multiscales(self, name: str) -> Multiscales | None:
+        """Parse the multiscale image of a store once, and re-use it until
+        the data of that name is replaced.
+
+        :param name: Name of the loaded image data
+        :type name:  str
+        :return: The multiscale image, or None if there is no data of that name
+        :rtype:  Multiscales | None
+        """
+        from ngff_zarr import from_ngff_zarr
+        store = self.stores.get(name)
+        if store is None:
+            return None
+        cached = self._multiscales.get(name)
+        if cached is None or cached[0] is not store:
+            cached = (store, from_ngff_zarr(store))
+            self._multiscales[name] = cached
+        return cached[1]
+
+    def _send_request(self, method: str, args: tuple, kwargs: dict) -> None:
+        fn = getattr(self.itk_viewer, method)
+        fn(*args, **kwargs)
 
     def fetch_value(func: Callable) -> Callable:
         """Decorator function that wraps the decorated function and returns the
@@ -318,19 +411,24 @@ class Viewer:
         """
         @functools.wraps(func)
         def _fetch_value(self, *args, **kwargs):
-            result = func(self, *args, **kwargs)
             global _cell_watcher
+            result = func(self, *args, **kwargs)
+            if isawaitable(result):
+                # Getters see the values of all the setters called before
+                self._debouncer.flush()
             if isawaitable(result) and _cell_watcher:
                 future = asyncio.ensure_future(result)
                 self.call_getter(future)
                 return future
             return result
+        # Marks the API wrapper functions for AsyncViewer
+        _fetch_value._fetches_value = True
         return _fetch_value
 
     @fetch_value
     def set_annotations_enabled(self, enabled: bool) -> None:
         """Set whether or not the annotations should be displayed. Queue the
-        function to be run in the background thread once the plugin API is
+        function to be run by the request scheduler once the plugin API is
         available.
 
         :param enabled: Should annotations be enabled
@@ -338,57 +436,57 @@ class Viewer:
         """
         self.queue_request('setAnnotationsEnabled', enabled)
     @fetch_value
-    async def get_annotations_enabled(self) -> asyncio.Future | bool:
+    def get_annotations_enabled(self) -> asyncio.Future | bool:
         """Determine if annotations are enabled.
 
         :return: The future for the coroutine, to be updated with the
         annotations visibility status.
         :rtype:  asyncio.Future | bool
         """
-        return await self.viewer_rpc.itk_viewer.getAnnotationsEnabled()
+        return self._get_state('getAnnotationsEnabled')
 
     @fetch_value
     def set_axes_enabled(self, enabled: bool) -> None:
         """Set whether or not the axes should be displayed. Queue the function
-        to be run in the background thread once the plugin API is available.
+        to be run by the request scheduler once the plugin API is available.
 
         :param enabled: If axes should be enabled
         :type enabled:  bool
         """
         self.queue_request('setAxesEnabled', enabled)
     @fetch_value
-    async def get_axes_enabled(self) -> asyncio.Future | bool:
+    def get_axes_enabled(self) -> asyncio.Future | bool:
         """Determine if the axes are enabled.
 
         :return: The future for the coroutine, to be updated with the axes
         visibility status.
         :rtype:  asyncio.Future | bool
         """
-        return await self.viewer_rpc.itk_viewer.getAxesEnabled()
+        return self._get_state('getAxesEnabled')
 
     @fetch_value
     def set_background_color(self, bg_color: List[float]) -> None:
         """Set the background color for the viewer. Queue the function to be
-        run in the background thread once the plugin API is available.
+        run by the request scheduler once the plugin API is available.
 
         :param bg_color: A list of floats [r, g, b, a]
         :type bg_color:  List[float]
         """
         self.queue_request('setBackgroundColor', bg_color)
     @fetch_value
-    async def get_background_color(self) -> asyncio.Future | List[float]:
+    def get_background_color(self) -> asyncio.Future | List[float]:
         """Get the current background color.
 
         :return: The future for the coroutine, to be updated with a list of
         floats representing the current color [r, g, b, a].
         :rtype:  asyncio.Future | List[float]
         """
-        return await self.viewer_rpc.itk_viewer.getBackgroundColor()
+        return self._get_state('getBackgroundColor')
 
     @fetch_value
     def set_cropping_planes(self, cropping_planes: CroppingPlanes) -> None:
         """Set the origins and normals for the current cropping planes. Queue
-        the function to be run in the background thread once the plugin API is
+        the function to be run by the request scheduler once the plugin API is
         available.
 
         :param cropping_planes: A list of 6 dicts representing the 6 cropping
@@ -398,7 +496,7 @@ class Viewer:
         """
         self.queue_request('setCroppingPlanes', cropping_planes)
     @fetch_value
-    async def get_cropping_planes(self) -> asyncio.Future | CroppingPlanes:
+    def get_cropping_planes(self) -> asyncio.Future | CroppingPlanes:
         """Get the origins and normals for the current cropping planes.
 
         :return: The future for the coroutine, to be updated with a list of 6
@@ -407,12 +505,12 @@ class Viewer:
         key with a list of three ints.
         :rtype:  asyncio.Future | CroppingPlanes
         """
-        return await self.viewer_rpc.itk_viewer.getCroppingPlanes()
+        return self._get_state('getCroppingPlanes')
 
     @fetch_value
     def set_image(self, image: Image, name: str = 'Image') -> None:
-        """Set the image to be rendered. Queue the function to be run in the
-        background thread once the plugin API is available.
+        """Set the image to be rendered. Queue the function to be run by the
+        request scheduler once the plugin API is available.
 
         :param image: Image data to render
         :type image:  Image
@@ -423,8 +521,10 @@ class Viewer:
         render_type = _detect_render_type(image, 'image')
         if render_type is RenderType.IMAGE:
             image = _get_viewer_image(image, label=False)
+            _build_viewer_image(image, self.max_workers)
             # Keep a reference to stores that we create
             self.stores[name] = image
+            self._multiscales.pop(name, None)
             if ENVIRONMENT is Env.HYPHA:
                 self.image = image
                 svc_name = f'{self.workspace}/itkwidgets-server:data-set'
@@ -437,6 +537,89 @@ class Viewer:
         elif render_type is RenderType.POINT_SET:
             image = _get_viewer_point_set(image)
             self.queue_request('setPointSets', image)
+    def pyramid_progress(self, name: str = 'Image') -> Dict[str, float]:
+        """Get the progress of the background build of an image pyramid.
+
+        :param name: Name of the loaded image data to use. 'Image', the
+        default, selects the first loaded image.
+        :type name:  str
+
+        :return: Fraction of the chunks computed by dataset path, from the
+        full resolution level to the coarsest. Levels that are not complete
+        are computed as the viewer requests their chunks.
+        :rtype:  Dict[str, float]
+        """
+        store = self.stores.get(name)
+        if store is None:
+            raise ValueError(f'No image data found for {name}.')
+        if hasattr(store, 'progress'):
+            return store.progress()
+        # Stores that were not generated by itkwidgets are complete
+        return {}
+
+    def codec_stats(self, name: str = 'Image') -> Dict[str, Dict[str, float]]:
+        """Get the compressor chosen for each level of an image pyramid, and
+        the compression ratio and throughput of the chunks encoded so far.
+
+        :param name: Name of the loaded image data to use. 'Image', the
+        default, selects the first loaded image.
+        :type name:  str
+
+        :return: By dataset path, the codec name, its probe ratio and
+        throughput, and the number, size, ratio and encoding throughput in
+        MB/s of the encoded chunks
+        :rtype:  Dict[str, Dict[str, float]]
+        """
+        store = self.stores.get(name)
+        if store is None:
+            raise ValueError(f'No image data found for {name}.')
+        if hasattr(store, 'codec_stats'):
+            return store.codec_stats()
+        # Stores that were not generated by itkwidgets are already encoded
+        return {}
+
+    @fetch_value
+    async def get_state(self) -> asyncio.Future | Dict[str, Any]:
+        """Get the viewer parameters that can be passed to view(), e.g. to
+        restore them later with set_state().
+
+        The viewer has no call that returns all of its state, so the
+        parameters are fetched with one request each. The requests are sent
+        concurrently, so together they take about as long as a single round
+        trip. The label image parameters are only included when a label image
+        is displayed.
+
+        :return: The future for the coroutine, to be updated with the
+        parameter values by name, e.g. {'cmap': 'viridis', ...}
+        :rtype:  asyncio.Future | Dict[str, Any]
+        """
+        params = {
+            key: getter for key, getter in state_params().items()
+            if 'LabelImage' in self.stores or not getter.startswith('getLabelImage')
+        }
+        values = await asyncio.gather(
+            *(self._get_state(getter) for getter in params.values())
+        )
+        return dict(zip(params.keys(), values))
+
+    @fetch_value
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Apply viewer parameters, e.g. those returned by get_state(). The
+        parameters are sent as a batch(), one request per parameter.
+
+        :param state: Parameter values by name, with the names of the view()
+        keyword arguments, e.g. {'cmap': 'viridis', 'z_slice': 42}
+        :type state:  Dict[str, Any]
+        :raises ValueError: if a parameter is not supported
+        """
+        methods = init_params_methods()
+        unknown = [key for key in state if key not in methods]
+        if unknown:
+            raise ValueError(f'Unsupported viewer parameters: {", ".join(unknown)}.')
+        with self.batch():
+            for key, value in state.items():
+                self.queue_request(methods[key], value)
+
     @fetch_value
     async def get_image(self, name: str = 'Image') -> NgffImage:
         """Get the full, highest resolution image.
@@ -448,8 +631,8 @@ class Viewer:
         :return: image
         :rtype:  NgffImage
         """
-        if store := self.stores.get(name):
-            multiscales = from_ngff_zarr(store)
+        from ngff_zarr import to_ngff_image
+        if multiscales := self._get_multiscales(name):
             loaded_image = multiscales.images[0]
             roi_data = loaded_image.data
             return to_ngff_image(
@@ -463,8 +646,8 @@ class Viewer:
 
     @fetch_value
     def set_image_blend_mode(self, mode: str) -> None:
-        """Set the volume rendering blend mode. Queue the function to be run in
-        the background thread once the plugin API is available.
+        """Set the volume rendering blend mode. Queue the function to be run by
+        the request scheduler once the plugin API is available.
 
         :param mode: Volume blend mode. Supported modes: 'Composite',
         'Maximum', 'Minimum', 'Average'. default: 'Composite'.
@@ -472,30 +655,30 @@ class Viewer:
         """
         self.queue_request('setImageBlendMode', mode)
     @fetch_value
-    async def get_image_blend_mode(self) -> asyncio.Future | str:
+    def get_image_blend_mode(self) -> asyncio.Future | str:
         """Get the current volume rendering blend mode.
 
         :return: The future for the coroutine, to be updated with the current
         blend mode.
         :rtype:  asyncio.Future | str
         """
-        return await self.viewer_rpc.itk_viewer.getImageBlendMode()
+        return self._get_state('getImageBlendMode')
 
     @property
     @fetch_value
-    async def color_map(self) -> asyncio.Future | str:
+    def color_map(self) -> asyncio.Future | str:
         """Get the color map for the current component/channel.
 
         :return: The future for the coroutine, to be updated with the current
         color map.
         :rtype:  asyncio.Future | str
         """
-        return await self.viewer_rpc.itk_viewer.getImageColorMap()
+        return self._get_state('getImageColorMap')
     @color_map.setter
     @fetch_value
     async def color_map(self, color_map: str) -> None:
         """Set the color map for the current component/channel. Queue the
-        function to be run in the background thread once the plugin API is
+        function to be run by the request scheduler once the plugin API is
         available.
 
         :param color_map: Color map for the current image. default: 'Grayscale'
@@ -506,7 +689,7 @@ class Viewer:
     @fetch_value
     def set_image_color_map(self, color_map: str) -> None:
         """Set the color map for the current component/channel. Queue the
-        function to be run in the background thread once the plugin API is
+        function to be run by the request scheduler once the plugin API is
         available.
 
         :param color_map: Color map for the current image. default: 'Grayscale'
@@ -514,30 +697,30 @@ class Viewer:
         """
         self.queue_request('setImageColorMap', color_map)
     @fetch_value
-    async def get_image_color_map(self) -> asyncio.Future | str:
+    def get_image_color_map(self) -> asyncio.Future | str:
         """Get the color map for the current component/channel.
 
         :return: The future for the coroutine, to be updated with the current
         color map.
         :rtype:  asyncio.Future | str
         """
-        return await self.viewer_rpc.itk_viewer.getImageColorMap()
+        return self._get_state('getImageColorMap')
 
     @property
     @fetch_value
-    async def color_range(self) -> asyncio.Future | List[float]:
+    def color_range(self) -> asyncio.Future | List[float]:
         """Get the range of the data values mapped to colors for the given
         image.
 
         :return: _description_
         :rtype:  asyncio.Future | List[float]
         """
-        return await self.viewer_rpc.itk_viewer.getImageColorRange()
+        return self._get_state('getImageColorRange')
     @color_range.setter
     @fetch_value
     async def color_range(self, range: List[float]) -> None:
         """The range of the data values mapped to colors for the given image.
-        Queue the function to be run in the background thread once the plugin
+        Queue the function to be run by the request scheduler once the plugin
         API is available.
 
         :param range: The [min, max] range of the data values
@@ -548,7 +731,7 @@ class Viewer:
     @fetch_value
     def set_image_color_range(self, range: List[float]) -> None:
         """The range of the data values mapped to colors for the given image.
-        Queue the function to be run in the background thread once the plugin
+        Queue the function to be run by the request scheduler once the plugin
         API is available.
 
         :param range: The [min, max] range of the data values
@@ -556,7 +739,7 @@ class Viewer:
         """
         self.queue_request('setImageColorRange', range)
     @fetch_value
-    async def get_image_color_range(self) -> asyncio.Future | List[float]:
+    def get_image_color_range(self) -> asyncio.Future | List[float]:
         """Get the range of the data values mapped to colors for the given
         image.
 
@@ -564,24 +747,23 @@ class Viewer:
         [min, max] range of the data values.
         :rtype:  asyncio.Future | List[float]
         """
-        return await self.viewer_rpc.itk_viewer.getImageColorRange()
+        return self._get_state('getImageColorRange')
 
     @property
     @fetch_value
-    async def vmin(self) -> asyncio.Future | float:
+    def vmin(self) -> asyncio.Future | float:
         """Get the minimum data value mapped to colors for the current image.
 
         :return: The future for the coroutine, to be updated with the minimum
         value mapped to the color map.
         :rtype:  asyncio.Future | float
         """
-        range = await self.get_image_color_range()
-        return range[0]
+        return self._get_state('getImageColorRange', select=lambda range: range[0])
     @vmin.setter
     @fetch_value
     async def vmin(self, vmin: float) -> None:
         """Set the minimum data value mapped to colors for the current image.
-        Queue the function to be run in the background thread once the plugin
+        Queue the function to be run by the request scheduler once the plugin
         API is available.
 
         :param vmin: The minimum value mapped to the color map.
@@ -591,20 +773,19 @@ class Viewer:
 
     @property
     @fetch_value
-    async def vmax(self) -> asyncio.Future | float:
+    def vmax(self) -> asyncio.Future | float:
         """Get the maximum data value mapped to colors for the current image.
 
         :return: The future for the coroutine, to be updated with the maximum
         value mapped to the color map.
         :rtype:  asyncio.Future | float
         """
-        range = await self.get_image_color_range()
-        return range[1]
+        return self._get_state('getImageColorRange', select=lambda range: range[1])
     @vmax.setter
     @fetch_value
     async def vmax(self, vmax: float) -> None:
         """Set the maximum data value mapped to colors for the current image.
-        Queue the function to be run in the background thread once the plugin
+        Queue the function to be run by the request scheduler once the plugin
         API is available.
 
         :param vmax: The maximum value mapped to the color map.
@@ -614,19 +795,19 @@ class Viewer:
 
     @property
     @fetch_value
-    async def color_bounds(self) -> asyncio.Future | List[float]:
+    def color_bounds(self) -> asyncio.Future | List[float]:
         """Get the range of the data values for color maps.
 
         :return: The future for the coroutine, to be updated with the
         [min, max] range of the data values.
         :rtype:  asyncio.Future | List[float]
         """
-        return await self.viewer_rpc.itk_viewer.getImageColorRangeBounds()
+        return self._get_state('getImageColorRangeBounds')
     @color_bounds.setter
     @fetch_value
     async def color_bounds(self, range: List[float]) -> None:
         """Set the range of the data values for color maps. Queue the function
-        to be run in the background thread once the plugin API is available.
+        to be run by the request scheduler once the plugin API is available.
 
         :param range: The [min, max] range of the data values.
         :type range:  List[float]
@@ -636,26 +817,26 @@ class Viewer:
     @fetch_value
     def set_image_color_range_bounds(self, range: List[float]) -> None:
         """Set the range of the data values for color maps. Queue the function
-        to be run in the background thread once the plugin API is available.
+        to be run by the request scheduler once the plugin API is available.
 
         :param range: The [min, max] range of the data values.
         :type range:  List[float]
         """
         self.queue_request('setImageColorRangeBounds', range)
     @fetch_value
-    async def get_image_color_range_bounds(self) -> asyncio.Future | List[float]:
+    def get_image_color_range_bounds(self) -> asyncio.Future | List[float]:
         """Get the range of the data values for color maps.
 
         :return: The future for the coroutine, to be updated with the
         [min, max] range of the data values.
         :rtype:  asyncio.Future | List[float]
         """
-        return await self.viewer_rpc.itk_viewer.getImageColorRangeBounds()
+        return self._get_state('getImageColorRangeBounds')
 
     @fetch_value
     def set_image_component_visibility(self, visibility: bool, component: int) -> None:
         """Set the given image intensity component index's visibility. Queue
-        the function to be run in the background thread once the plugin API is
+        the function to be run by the request scheduler once the plugin API is
         available.
 
         :param visibility: Whether or not the component should be visible.
@@ -665,7 +846,7 @@ class Viewer:
         """
         self.queue_request('setImageComponentVisibility', visibility, component)
     @fetch_value
-    async def get_image_component_visibility(
+    def get_image_component_visibility(
         self, component: int
     ) -> asyncio.Future | int:
         """Get the given image intensity component index's visibility.
@@ -676,23 +857,23 @@ class Viewer:
         component's visibility.
         :rtype:  asyncio.Future | int
         """
-        return await self.viewer_rpc.itk_viewer.getImageComponentVisibility(component)
+        return self._get_state('getImageComponentVisibility', component)
 
     @property
     @fetch_value
-    async def gradient_opacity(self) -> asyncio.Future | float:
+    def gradient_opacity(self) -> asyncio.Future | float:
         """Get the gradient opacity for composite volume rendering.
 
         :return: The future for the coroutine, to be updated with the gradient
         opacity.
         :rtype:  asyncio.Future | float
         """
-        return await self.viewer_rpc.itk_viewer.getImageGradientOpacity()
+        return self._get_state('getImageGradientOpacity')
     @gradient_opacity.setter
     @fetch_value
     async def gradient_opacity(self, opacity: float) -> None:
         """Set the gradient opacity for composite volume rendering. Queue
-        the function to be run in the background thread once the plugin API is
+        the function to be run by the request scheduler once the plugin API is
         available.
 
         :param opacity: Gradient opacity in the range (0.0, 1.0]. default: 0.5
@@ -703,7 +884,7 @@ class Viewer:
     @fetch_value
     def set_image_gradient_opacity(self, opacity: float) -> None:
         """Set the gradient opacity for composite volume rendering. Queue
-        the function to be run in the background thread once the plugin API is
+        the function to be run by the request scheduler once the plugin API is
         available.
 
         :param opacity: Gradient opacity in the range (0.0, 1.0]. default: 0.5
@@ -711,30 +892,30 @@ class Viewer:
         """
         self.queue_request('setImageGradientOpacity', opacity)
     @fetch_value
-    async def get_image_gradient_opacity(self) -> asyncio.Future | float:
+    def get_image_gradient_opacity(self) -> asyncio.Future | float:
         """Get the gradient opacity for composite volume rendering.
 
         :return: The future for the coroutine, to be updated with the gradient
         opacity.
         :rtype:  asyncio.Future | float
         """
-        return await self.viewer_rpc.itk_viewer.getImageGradientOpacity()
+        return self._get_state('getImageGradientOpacity')
 
     @property
     @fetch_value
-    async def gradient_opacity_scale(self) -> asyncio.Future | float:
+    def gradient_opacity_scale(self) -> asyncio.Future | float:
         """Get the gradient opacity scale for composite volume rendering.
 
         :return: The future for the coroutine, to be updated with the current
         gradient opacity scale.
         :rtype:  asyncio.Future | float
         """
-        return await self.viewer_rpc.itk_viewer.getImageGradientOpacityScale()
+        return self._get_state('getImageGradientOpacityScale')
     @gradient_opacity_scale.setter
     @fetch_value
     async def gradient_opacity_scale(self, min: float) -> None:
         """Set the gradient opacity scale for composite volume rendering. Queue
-        the function to be run in the background thread once the plugin API is
+        the function to be run by the request scheduler once the plugin API is
         available.
 
         :param min: Gradient opacity scale in the range (0.0, 1.0] default: 0.5
@@ -745,7 +926,7 @@ class Viewer:
     @fetch_value
     def set_image_gradient_opacity_scale(self, min: float) -> None:
         """Set the gradient opacity scale for composite volume rendering. Queue
-        the function to be run in the background thread once the plugin API is
+        the function to be run by the request scheduler once the plugin API is
         available.
 
         :param min: Gradient opacity scale in the range (0.0, 1.0] default: 0.5
@@ -753,27 +934,27 @@ class Viewer:
         """
         self.queue_request('setImageGradientOpacityScale', min)
     @fetch_value
-    async def get_image_gradient_opacity_scale(self) -> asyncio.Future | float:
+    def get_image_gradient_opacity_scale(self) -> asyncio.Future | float:
         """Get the gradient opacity scale for composite volume rendering.
 
         :return: The future for the coroutine, to be updated with the current
         gradient opacity scale.
         :rtype:  asyncio.Future | float
         """
-        return await self.viewer_rpc.itk_viewer.getImageGradientOpacityScale()
+        return self._get_state('getImageGradientOpacityScale')
 
     @fetch_value
     def set_image_interpolation_enabled(self, enabled: bool) -> None:
         """Set whether to use linear as opposed to nearest neighbor
-        interpolation for image slices. Queue the function to be run in the
-        background thread once the plugin API is available.
+        interpolation for image slices. Queue the function to be run by the
+        request scheduler once the plugin API is available.
 
         :param enabled: Use linear interpolation. default: True
         :type enabled:  bool
         """
         self.queue_request('setImageInterpolationEnabled', enabled)
     @fetch_value
-    async def get_image_interpolation_enabled(self) -> asyncio.Future | bool:
+    def get_image_interpolation_enabled(self) -> asyncio.Future | bool:
         """Get whether to use linear as opposed to nearest neighbor
         interpolation for image slices.
 
@@ -781,12 +962,12 @@ class Viewer:
         linear interpolation is used.
         :rtype:  asyncio.Future | bool
         """
-        return await self.viewer_rpc.itk_viewer.getImageInterpolationEnabled()
+        return self._get_state('getImageInterpolationEnabled')
 
     @fetch_value
     def set_image_piecewise_function_points(self, points: Points2d) -> None:
         """Set the volume rendering opacity transfer function points. 
-        Queue the function to be run in the background thread once
+        Queue the function to be run by the request scheduler once
         the plugin API is available.
 
         :param points: Opacity piecewise transfer function points. Example args: [[.2, .1], [.8, .9]]
@@ -794,7 +975,7 @@ class Viewer:
         """
         self.queue_request('setImagePiecewiseFunctionPoints', points)
     @fetch_value
-    async def get_image_piecewise_function_points(
+    def get_image_piecewise_function_points(
         self,
     ) -> asyncio.Future | Points2d:
         """Get the volume rendering opacity transfer function points.
@@ -803,12 +984,12 @@ class Viewer:
         transfer function points.
         :rtype:  asyncio.Future | Points2d
         """
-        return await self.viewer_rpc.itk_viewer.getImagePiecewiseFunctionPoints()
+        return self._get_state('getImagePiecewiseFunctionPoints')
 
     @fetch_value
     def set_image_shadow_enabled(self, enabled: bool) -> None:
         """Set whether to used gradient-based shadows in the volume rendering.
-        Queue the function to be run in the background thread once the plugin
+        Queue the function to be run by the request scheduler once the plugin
         API is available.
 
         :param enabled: Apply shadows. default: True
@@ -816,54 +997,54 @@ class Viewer:
         """
         self.queue_request('setImageShadowEnabled', enabled)
     @fetch_value
-    async def get_image_shadow_enabled(self) -> asyncio.Future | bool:
+    def get_image_shadow_enabled(self) -> asyncio.Future | bool:
         """Get whether gradient-based shadows are used in the volume rendering.
 
         :return: The future for the coroutine, to be updated with whether
         gradient-based shadows are used.
         :rtype:  asyncio.Future | bool
         """
-        return await self.viewer_rpc.itk_viewer.getImageShadowEnabled()
+        return self._get_state('getImageShadowEnabled')
 
     @fetch_value
     def set_image_volume_sample_distance(self, distance: float) -> None:
         """Set the sampling distance for volume rendering, normalized from
         0.0 to 1.0. Lower values result in a higher quality rendering. High
-        values improve the framerate. Queue the function to be run in the
-        background thread once the plugin API is available.
+        values improve the framerate. Queue the function to be run by the
+        request scheduler once the plugin API is available.
 
         :param distance: Sampling distance for volume rendering. default: 0.2
         :type distance:  float
         """
         self.queue_request('setImageVolumeSampleDistance', distance)
     @fetch_value
-    async def get_image_volume_sample_distance(self) -> asyncio.Future | float:
+    def get_image_volume_sample_distance(self) -> asyncio.Future | float:
         """Get the normalized sampling distance for volume rendering.
 
         :return: The future for the coroutine, to be updated with the
         normalized sampling distance.
         :rtype:  asyncio.Future | float
         """
-        return await self.viewer_rpc.itk_viewer.getImageVolumeSampleDistance()
+        return self._get_state('getImageVolumeSampleDistance')
 
     @fetch_value
     def set_image_volume_scattering_blend(self, scattering_blend: float) -> None:
-        """Set the volumetric scattering blend. Queue the function to be run in
-        the background thread once the plugin API is available.
+        """Set the volumetric scattering blend. Queue the function to be run by
+        the request scheduler once the plugin API is available.
 
         :param scattering_blend: Volumetric scattering blend in the range [0, 1]
         :type scattering_blend:  float
         """
         self.queue_request('setImageVolumeScatteringBlend', scattering_blend)
     @fetch_value
-    async def get_image_volume_scattering_blend(self) -> asyncio.Future | float:
+    def get_image_volume_scattering_blend(self) -> asyncio.Future | float:
         """Get the volumetric scattering blend.
 
         :return: The future for the coroutine, to be updated with the current
         volumetric scattering blend.
         :rtype:  asyncio.Future | float
         """
-        return await self.viewer_rpc.itk_viewer.getImageVolumeScatteringBlend()
+        return self._get_state('getImageVolumeScatteringBlend')
 
     @fetch_value
     async def get_current_scale(self) -> asyncio.Future | int:
@@ -874,7 +1055,7 @@ class Viewer:
         :return: scale
         :rtype:  asyncio.Future | int
         """
-        return await self.viewer_rpc.itk_viewer.getLoadedScale()
+        return await self._call_viewer('getLoadedScale')
 
     @fetch_value
     async def get_roi_image(self, scale: int = -1, name: str = 'Image') -> NgffImage:
@@ -890,24 +1071,19 @@ class Viewer:
         :return: roi_image
         :rtype:  NgffImage
         """
+        multiscales = self._get_multiscales(name)
+        if multiscales is None:
+            raise ValueError(f'No image data found for {name}.')
         if scale == -1:
-            scale = await self.get_current_scale()
-        roi_slices = await self.get_roi_slice(scale)
-        roi_region = await self.get_roi_region()
-        if store := self.stores.get(name):
-            multiscales = from_ngff_zarr(store)
-            loaded_image = multiscales.images[scale]
-            roi_data = loaded_image.data[roi_slices]
-            roi_data = roi_data.rechunk(loaded_image.data.chunksize)
-            return to_ngff_image(
-                roi_data,
-                dims=loaded_image.dims,
-                scale=loaded_image.scale,
-                translation=roi_region[0],
-                name=name,
-                axes_units=loaded_image.axes_units
+            # The two requests are sent concurrently, rather than one after
+            # the other
+            scale, bounds = await asyncio.gather(
+                self._call_viewer('getLoadedScale'),
+                self._call_viewer('getCroppedImageWorldBounds'),
             )
-        raise ValueError(f'No image data found for {name}.')
+        else:
+            bounds = await self._call_viewer('getCroppedImageWorldBounds')
+        return roi_image(multiscales.images[scale], bounds, name)
 
     @fetch_value
     async def get_roi_multiscale(self, name: str = 'Image') -> Multiscales:
@@ -916,15 +1092,15 @@ class Viewer:
         :param name: Name of the loaded image data to use. 'Image', the
         default, selects the first loaded image.
         :type name:  str
-                CellWatcher().update_viewer_status(self.name, False)
 
         :return: roi_multiscales
         :rtype:  Multiscales NgffImage
         """
-        if store := self.stores.get(name):
-            multiscales = from_ngff_zarr(store)
-            scales = range(len(multiscales.images))
-            images = [await self.get_roi_image(s) for s in scales]
+        from ngff_zarr import Multiscales
+        if multiscales := self._get_multiscales(name):
+            # The ROI of every scale is sliced from the same world bounds
+            bounds = await self._call_viewer('getCroppedImageWorldBounds')
+            images = [roi_image(image, bounds, name) for image in multiscales.images]
             return Multiscales(
                 images=images,
                 metadata=multiscales.metadata,
@@ -945,7 +1121,7 @@ class Viewer:
         :return: roi_region
         :rtype:  asyncio.Future | List[Dict[str, float]]
         """
-        bounds = await self.viewer_rpc.itk_viewer.getCroppedImageWorldBounds()
+        bounds = await self._call_viewer('getCroppedImageWorldBounds')
         x0, x1, y0, y1, z0, z1 = bounds
         return [{ 'x': x0, 'y': y0, 'z': z0 }, { 'x': x1, 'y': y1, 'z': z1 }]
 
@@ -970,11 +1146,11 @@ class Viewer:
         """
         if scale == -1:
             scale = await self.get_current_scale()
-        idxs = await self.viewer_rpc.itk_viewer.getCroppedIndexBounds(scale)
+        idxs = await self._call_viewer('getCroppedIndexBounds', scale)
         x0, x1 = idxs['x']
         y0, y1 = idxs['y']
         z0, z1 = idxs['z']
-        return np.index_exp[int(z0):int(z1+1), int(y0):int(y1+1), int(x0):int(x1+1)]
+        return (slice(int(z0), int(z1+1)), slice(int(y0), int(y1+1)), slice(int(x0), int(x1+1)))
 
     @fetch_value
     def compare_images(
@@ -990,7 +1166,7 @@ class Viewer:
         """Fuse 2 images with a checkerboard filter or as a 2 component image.
         The moving image is re-sampled to the fixed image space. Set a keyword
         argument to None to use defaults based on method. Queue the function to
-        be run in the background thread once the plugin API is available.
+        be run by the request scheduler once the plugin API is available.
 
         :param fixed_image: Static image the moving image is re-sampled to. For
         non-checkerboard methods ('blend', 'green-magenta', etc.), the fixed
@@ -1055,8 +1231,8 @@ class Viewer:
 
     @fetch_value
     def set_label_image(self, label_image: Image) -> None:
-        """Set the label image to be rendered. Queue the function to be run in
-        the background thread once the plugin API is available.
+        """Set the label image to be rendered. Queue the function to be run by
+        the request scheduler once the plugin API is available.
 
         :param label_image: The label map to visualize
         :type label_image:  Image
@@ -1065,7 +1241,9 @@ class Viewer:
         render_type = _detect_render_type(label_image, 'image')
         if render_type is RenderType.IMAGE:
             label_image = _get_viewer_image(label_image, label=True)
+            _build_viewer_image(label_image, self.max_workers)
             self.stores['LabelImage'] = label_image
+            self._multiscales.pop('LabelImage', None)
             if ENVIRONMENT is Env.HYPHA:
                 self.label_image = label_image
                 svc_name = f"{self.workspace}/itkwidgets-server:data-set"
@@ -1084,8 +1262,8 @@ class Viewer:
         :return: label_image
         :rtype:  NgffImage
         """
-        if store := self.stores.get('LabelImage'):
-            multiscales = from_ngff_zarr(store)
+        from ngff_zarr import to_ngff_image
+        if multiscales := self._get_multiscales('LabelImage'):
             loaded_image = multiscales.images[0]
             roi_data = loaded_image.data
             return to_ngff_image(
@@ -1100,26 +1278,26 @@ class Viewer:
     @fetch_value
     def set_label_image_blend(self, blend: float) -> None:
         """Set the label map blend with intensity image. Queue the function to
-        be run in the background thread once the plugin API is available.
+        be run by the request scheduler once the plugin API is available.
 
         :param blend: Blend with intensity image, from 0.0 to 1.0. default: 0.5
         :type blend:  float
         """
         self.queue_request('setLabelImageBlend', blend)
     @fetch_value
-    async def get_label_image_blend(self) -> asyncio.Future | float:
+    def get_label_image_blend(self) -> asyncio.Future | float:
         """Get the label map blend with intensity image.
 
         :return: The future for the coroutine, to be updated with the blend
         with the intensity image.
         :rtype: asyncio.Future | float
         """
-        return await self.viewer_rpc.itk_viewer.getLabelImageBlend()
+        return self._get_state('getLabelImageBlend')
 
     @fetch_value
     def set_label_image_label_names(self, names: List[str]) -> None:
         """Set the string names associated with the integer label values. Queue
-        the function to be run in the background thread once the plugin API is
+        the function to be run by the request scheduler once the plugin API is
         available.
 
         :param names: A list of names for each label map.
@@ -1127,38 +1305,38 @@ class Viewer:
         """
         self.queue_request('setLabelImageLabelNames', names)
     @fetch_value
-    async def get_label_image_label_names(self) -> asyncio.Future | List[str]:
+    def get_label_image_label_names(self) -> asyncio.Future | List[str]:
         """Get the string names associated with the integer label values.
 
         :return: The future for the coroutine, to be updated with the list of
         names for each label map.
         :rtype:  asyncio.Future | List[str]
         """
-        return await self.viewer_rpc.itk_viewer.getLabelImageLabelNames()
+        return self._get_state('getLabelImageLabelNames')
 
     @fetch_value
     def set_label_image_lookup_table(self, lookup_table: str) -> None:
         """Set the lookup table for the label map. Queue the function to be run
-        in the background thread once the plugin API is available.
+        by the request scheduler once the plugin API is available.
 
         :param lookup_table: Label map lookup table. default: 'glasbey'
         :type lookup_table:  str
         """
         self.queue_request('setLabelImageLookupTable', lookup_table)
     @fetch_value
-    async def get_label_image_lookup_table(self) -> asyncio.Future | str:
+    def get_label_image_lookup_table(self) -> asyncio.Future | str:
         """Get the lookup table for the label map.
 
         :return: The future for the coroutine, to be updated with the current
         label map lookup table.
         :rtype:  asyncio.Future | str
         """
-        return await self.viewer_rpc.itk_viewer.getLabelImageLookupTable()
+        return self._get_state('getLabelImageLookupTable')
 
     @fetch_value
     def set_label_image_weights(self, weights: float) -> None:
         """Set the rendering weight assigned to current label. Queue the
-        function to be run in the background thread once the plugin API is
+        function to be run by the request scheduler once the plugin API is
         available.
 
         :param weights: Assign the current label rendering weight between
@@ -1167,19 +1345,19 @@ class Viewer:
         """
         self.queue_request('setLabelImageWeights', weights)
     @fetch_value
-    async def get_label_image_weights(self) -> asyncio.Future | float:
+    def get_label_image_weights(self) -> asyncio.Future | float:
         """Get the rendering weight assigned to current label.
 
         :return: The future for the coroutine, to be updated with the current
         label rendering weight.
         :rtype:  asyncio.Future | float
         """
-        return await self.viewer_rpc.itk_viewer.getLabelImageWeights()
+        return self._get_state('getLabelImageWeights')
 
     @fetch_value
     def select_layer(self, name: str) -> None:
         """Set the layer identified by `name` as the current layer. Queue the
-        function to be run in the background thread once the plugin API is
+        function to be run by the request scheduler once the plugin API is
         available.
 
         :param name: The name of thelayer to select.
@@ -1194,12 +1372,12 @@ class Viewer:
         layer names.
         :rtype:  asyncio.Future | List[str]
         """
-        return await self.viewer_rpc.itk_viewer.getLayerNames()
+        return await self._call_viewer('getLayerNames')
 
     @fetch_value
     def set_layer_visibility(self, visible: bool, name: str) -> None:
-        """Set whether the layer is visible. Queue the function to be run in
-        the background thread once the plugin API is available.
+        """Set whether the layer is visible. Queue the function to be run by
+        the request scheduler once the plugin API is available.
 
         :param visible: Layer visibility. default: True
         :type visible:  bool
@@ -1208,7 +1386,7 @@ class Viewer:
         """
         self.queue_request('setLayerVisibility', visible, name)
     @fetch_value
-    async def get_layer_visibility(self, name: str) -> asyncio.Future | bool:
+    def get_layer_visibility(self, name: str) -> asyncio.Future | bool:
         """Get whether the layer is visible.
 
         :param name: The name of the layer to fetch the visibility for.
@@ -1217,7 +1395,7 @@ class Viewer:
         visibility.
         :rtype:  asyncio.Future | bool
         """
-        return await self.viewer_rpc.itk_viewer.getLayerVisibility(name)
+        return self._get_state('getLayerVisibility', name)
 
     @fetch_value
     def get_loaded_image_names(self) -> List[str]:
@@ -1231,7 +1409,7 @@ class Viewer:
     @fetch_value
     def add_point_set(self, point_set: PointSet) -> None:
         """Add a point set to the visualization. Queue the function to be run
-        in the background thread once the plugin API is available.
+        by the request scheduler once the plugin API is available.
 
         :param point_set: An array of points to visualize.
         :type point_set:  PointSet
@@ -1241,7 +1419,7 @@ class Viewer:
     @fetch_value
     def set_point_set(self, point_set: PointSet) -> None:
         """Set the point set to the visualization. Queue the function to be run
-        in the background thread once the plugin API is available.
+        by the request scheduler once the plugin API is available.
 
         :param point_set: An array of points to visualize.
         :type point_set:  PointSet
@@ -1252,7 +1430,7 @@ class Viewer:
     @fetch_value
     def set_rendering_view_container_style(self, container_style: Style) -> None:
         """Set the CSS style for the rendering view `div`'s. Queue the function
-        to be run in the background thread once the plugin API is available.
+        to be run by the request scheduler once the plugin API is available.
 
         :param container_style: A dict of string keys and sting values
         representing the desired CSS styling.
@@ -1267,70 +1445,70 @@ class Viewer:
         string keys and sting values representing the desired CSS styling.
         :rtype:  Style
         """
-        return await self.viewer_rpc.itk_viewer.getRenderingViewStyle()
+        return await self._call_viewer('getRenderingViewStyle')
 
     @fetch_value
     def set_rotate(self, enabled: bool) -> None:
         """Set whether the camera should continuously rotate around the scene
-        in volume rendering mode. Queue the function to be run in the
-        background thread once the plugin API is available.
+        in volume rendering mode. Queue the function to be run by the
+        request scheduler once the plugin API is available.
 
         :param enabled: Rotate the camera. default: False
         :type enabled:  bool
         """
         self.queue_request('setRotateEnabled', enabled)
     @fetch_value
-    async def get_rotate(self) -> bool:
+    def get_rotate(self) -> bool:
         """Get whether the camera is rotating.
 
         :return: The future for the coroutine, to be updated with the boolean
         status.
         :rtype:  bool
         """
-        return await self.viewer_rpc.itk_viewer.getRotateEnabled()
+        return self._get_state('getRotateEnabled')
 
     @fetch_value
     def set_ui_collapsed(self, collapsed: bool) -> None:
         """Collapse the native widget user interface. Queue the function to be
-        run in the background thread once the plugin API is available.
+        run by the request scheduler once the plugin API is available.
 
         :param collapsed: If the UI interface should be collapsed. default: True
         :type collapsed:  bool
         """
         self.queue_request('setUICollapsed', collapsed)
     @fetch_value
-    async def get_ui_collapsed(self) -> bool:
+    def get_ui_collapsed(self) -> bool:
         """Get the collapsed status of the UI interface.
 
         :return: The future for the coroutine, to be updated with the collapsed
         state of the UI interface.
         :rtype:  bool
         """
-        return await self.viewer_rpc.itk_viewer.getUICollapsed()
+        return self._get_state('getUICollapsed')
 
     @fetch_value
     def set_units(self, units: str) -> None:
         """Set the units to display in the scale bar. Queue the function to be
-        run in the background thread once the plugin API is available.
+        run by the request scheduler once the plugin API is available.
 
         :param units: Units to use.
         :type units:  str
         """
         self.queue_request('setUnits', units)
     @fetch_value
-    async def get_units(self) -> str:
+    def get_units(self) -> str:
         """Get the units to display in the scale bar.
 
         :return: The future for the coroutine, to be updated with the units
         used in the scale bar.
         :rtype:  str
         """
-        return await self.viewer_rpc.itk_viewer.getUnits()
+        return self._get_state('getUnits')
 
     @fetch_value
     def set_view_mode(self, mode: str) -> None:
-        """Set the viewing mode. Queue the function to be run in the background
-        thread once the plugin API is available.
+        """Set the viewing mode. Queue the function to be run by the request
+        scheduler once the plugin API is available.
 
         :param mode: View mode. One of the following: 'XPlane', 'YPlane',
         'ZPlane', or 'Volume'. default: 'Volume'
@@ -1338,18 +1516,18 @@ class Viewer:
         """
         self.queue_request('setViewMode', mode)
     @fetch_value
-    async def get_view_mode(self) -> str:
+    def get_view_mode(self) -> str:
         """Get the current view mode.
 
         :return: The future for the coroutine, to be updated with the view mode.
         :rtype:  str
         """
-        return await self.viewer_rpc.itk_viewer.getViewMode()
+        return self._get_state('getViewMode')
 
     @fetch_value
     def set_x_slice(self, position: float) -> None:
         """Set the position in world space of the X slicing plane. Queue the
-        function to be run in the background thread once the plugin API is
+        function to be run by the request scheduler once the plugin API is
         available.
 
         :param position: Position in world space.
@@ -1357,19 +1535,19 @@ class Viewer:
         """
         self.queue_request('setXSlice', position)
     @fetch_value
-    async def get_x_slice(self) -> float:
+    def get_x_slice(self) -> float:
         """Get the position in world space of the X slicing plane.
 
         :return: The future for the coroutine, to be updated with the position
         in world space.
         :rtype:  float
         """
-        return await self.viewer_rpc.itk_viewer.getXSlice()
+        return self._get_state('getXSlice')
 
     @fetch_value
     def set_y_slice(self, position: float) -> None:
         """Set the position in world space of the Y slicing plane. Queue the
-        function to be run in the background thread once the plugin API is
+        function to be run by the request scheduler once the plugin API is
         available.
 
         :param position: Position in world space.
@@ -1377,19 +1555,19 @@ class Viewer:
         """
         self.queue_request('setYSlice', position)
     @fetch_value
-    async def get_y_slice(self) -> float:
+    def get_y_slice(self) -> float:
         """Get the position in world space of the Y slicing plane.
 
         :return: The future for the coroutine, to be updated with the position
         in world space.
         :rtype:  float
         """
-        return await self.viewer_rpc.itk_viewer.getYSlice()
+        return self._get_state('getYSlice')
 
     @fetch_value
     def set_z_slice(self, position: float) -> None:
         """Set the position in world space of the Z slicing plane. Queue the
-        function to be run in the background thread once the plugin API is
+        function to be run by the request scheduler once the plugin API is
         available.
 
         :param position: Position in world space.
@@ -1397,14 +1575,77 @@ class Viewer:
         """
         self.queue_request('setZSlice', position)
     @fetch_value
-    async def get_z_slice(self) -> float:
+    def get_z_slice(self) -> float:
         """Get the position in world space of the Z slicing plane.
 
         :return: The future for the coroutine, to be updated with the position
         in world space.
         :rtype:  float
         """
-        return await self.viewer_rpc.itk_viewer.getZSlice()
+        return self._get_state('getZSlice')
+
+
+class AsyncViewer:
+    """Coroutine interface to a Viewer, for asyncio scripts, the standalone
+    REPL and notebooks with top-level await.
+
+    Every Viewer getter and setter is available as a coroutine function with
+    the same name and arguments, e.g. `await viewer.get_z_slice()`, that
+    bypasses the CellWatcher. Getters wait for the viewer to be ready, so
+    many can be gathered at once:
+
+        viewer = AsyncViewer(image=image)
+        x, y, z = await asyncio.gather(
+            viewer.get_x_slice(), viewer.get_y_slice(), viewer.get_z_slice()
+        )
+
+    Properties that are read from the viewer, e.g. `color_map`, are
+    awaitable: `await viewer.color_map`. They are not assigned to, use their
+    setter coroutine, e.g. `await viewer.set_image_color_map('jet')`.
+    Other attributes, e.g. `batch` or `stores`, are those of the Viewer.
+    """
+
+    def __init__(self, viewer: Viewer = None, **kwargs) -> None:
+        """Wrap a viewer, or create one with the Viewer arguments.
+
+        :param viewer: An existing viewer, default: Viewer(**kwargs)
+        :type viewer:  Viewer
+        """
+        self.viewer = viewer if viewer is not None else Viewer(**kwargs)
+
+    def _coroutine(self, func: Callable) -> Callable:
+        viewer = self.viewer
+
+        @functools.wraps(func)
+        async def method(*args, **kwargs):
+            result = func(viewer, *args, **kwargs)
+            if isawaitable(result):
+                # Getters see the values of all the setters called before
+                viewer._debouncer.flush()
+                result = await result
+            return result
+        return method
+
+    def __getattr__(self, name: str):
+        attr = getattr(Viewer, name, None)
+        if isinstance(attr, property):
+            if not getattr(attr.fget, '_fetches_value', False):
+                return getattr(self.viewer, name)
+            # A new coroutine on every access
+            return self._coroutine(attr.fget.__wrapped__)()
+        if not getattr(attr, '_fetches_value', False):
+            return getattr(self.viewer, name)
+        method = self._coroutine(attr.__wrapped__)
+        # Created once per name
+        setattr(self, name, method)
+        return method
+
+    def __setattr__(self, name: str, value) -> None:
+        if isinstance(getattr(Viewer, name, None), property):
+            raise AttributeError(
+                f"Cannot set {name} of an AsyncViewer, await its setter method instead"
+            )
+        super().__setattr__(name, value)
 
 
 def view(data=None, **kwargs):
@@ -1531,6 +1772,9 @@ def view(data=None, **kwargs):
     :param units: Units to display in the scale bar.
     :type  units: string
 
+    :param max_workers: Number of threads used to build the image pyramids in the background, coarsest level first. default: config.max_workers, or the number of CPUs
+    :type  max_workers: int
+
     Returns
     -------
 
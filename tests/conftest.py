@@ -0,0 +1,49 @@
+import pytest
+
+from itkwidgets._request_queue import RequestDebouncer
+from itkwidgets.viewer import Viewer
+
+
+class _Value:
+    """Awaitable result of a viewer API call."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __await__(self):
+        return self.value
+        yield
+
+
+class FakeViewerAPI:
+    """Records the calls made to the viewer plugin API and answers getters
+    from `values`."""
+
+    def __init__(self, **values):
+        self.values = values
+        self.calls = []
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            self.calls.append((method, args))
+            return _Value(self.values.get(method))
+        return call
+
+
+@pytest.fixture
+def viewer_api():
+    return FakeViewerAPI(getImageColorMap='jet', getXSlice=1.0, getYSlice=2.0)
+
+
+@pytest.fixture
+def viewer(viewer_api):
+    """A Viewer that is connected to a fake plugin API, without a widget."""
+    viewer = Viewer.__new__(Viewer)
+    viewer.stores = {}
+    viewer._multiscales = {}
+    viewer.name = 'viewer'
+    viewer.max_workers = None
+    viewer._debouncer = RequestDebouncer(viewer._send_request)
+    viewer._batch = None
+    viewer._itk_viewer = viewer_api
+    return viewer
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from itkwidgets.viewer import AsyncViewer
+
+
+def test_getter_methods_are_coroutines(viewer):
+    async_viewer = AsyncViewer(viewer)
+
+    async def get_slices():
+        return await asyncio.gather(async_viewer.get_x_slice(), async_viewer.get_y_slice())
+
+    assert asyncio.run(get_slices()) == [1.0, 2.0]
+
+
+def test_setter_methods_are_coroutines(viewer, viewer_api):
+    async_viewer = AsyncViewer(viewer)
+    asyncio.run(async_viewer.set_image_color_map('viridis'))
+    assert ('setImageColorMap', ('viridis',)) in viewer_api.calls
+
+
+def test_properties_are_awaitable(viewer):
+    async_viewer = AsyncViewer(viewer)
+
+    async def get_color_map():
+        return await async_viewer.color_map
+
+    assert asyncio.run(get_color_map()) == 'jet'
+    with pytest.raises(AttributeError):
+        async_viewer.color_map = 'viridis'
+
+
+def test_batch(viewer, viewer_api):
+    async_viewer = AsyncViewer(viewer)
+
+    async def set_in_batch():
+        with async_viewer.batch():
+            await async_viewer.set_image_color_map('viridis')
+            await async_viewer.set_image_color_map('magma')
+            assert viewer_api.calls == []
+
+    asyncio.run(set_in_batch())
+    assert viewer_api.calls == [('setImageColorMap', ('magma',))]
+
+
+def test_other_attributes_pass_through(viewer):
+    async_viewer = AsyncViewer(viewer)
+    assert async_viewer.stores is viewer.stores
+    assert async_viewer.has_viewer
+    assert async_viewer.name == 'viewer'
@@ -0,0 +1,26 @@
+import pytest
+
+from itkwidgets.cell_watcher import _assigned_names
+
+
+@pytest.mark.parametrize('code, names', [
+    ('x = viewer.get_x_slice()\nprint(x)', {'x'}),
+    ('x, y = viewer.get_x_slice(), viewer.get_y_slice()', {'x', 'y'}),
+    ('for z in range(3):\n    viewer.set_z_slice(z)', {'z'}),
+])
+def test_assigned_names(code, names):
+    assert _assigned_names(code) == names
+
+
+@pytest.mark.parametrize('code', [
+    # Magics
+    "get_ipython().run_line_magic('time', 'x = viewer.get_x_slice()')",
+    # Functions that may assign globals
+    'def get():\n    global x\n    x = viewer.get_x_slice()\nget()',
+    'get_slices()',
+    "exec('x = viewer.get_x_slice()')",
+    "globals()['x'] = viewer.get_x_slice()",
+    'x = (',
+])
+def test_assigned_names_unknown(code):
+    assert _assigned_names(code) is None
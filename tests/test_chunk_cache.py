@@ -0,0 +1,78 @@
+import pytest
+import zarr
+
+from itkwidgets._chunk_cache import ChunkCache
+from itkwidgets.config import config
+
+
+class CountingStore(zarr.storage.DirectoryStore):
+    """Counts the items that are read."""
+
+    def __init__(self, path):
+        super().__init__(path, dimension_separator='/')
+        self.reads = []
+
+    def __getitem__(self, key):
+        self.reads.append(key)
+        return super().__getitem__(key)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CountingStore(str(tmp_path))
+    store['image/0'] = bytes(100)
+    store['image/1'] = bytes(100)
+    return store
+
+
+def test_hit(store):
+    cache = ChunkCache()
+    assert cache.get(store, 'image/0') == bytes(100)
+    assert cache.get(store, 'image/0') == bytes(100)
+    assert store.reads == ['image/0']
+    assert cache.stats()['hits'] == 1
+
+
+def test_missing_key_is_not_cached(store):
+    cache = ChunkCache()
+    for _ in range(2):
+        with pytest.raises(KeyError):
+            cache.get(store, 'image/2')
+    assert store.reads == ['image/2', 'image/2']
+
+
+def test_discard(store):
+    cache = ChunkCache()
+    cache.get(store, 'image/0')
+    store['image/0'] = bytes(1)
+    cache.discard(store, 'image/0')
+    assert cache.get(store, 'image/0') == bytes(1)
+
+
+def test_discard_store(store):
+    cache = ChunkCache()
+    cache.get(store, 'image/0')
+    cache.get(store, 'image/1')
+    cache.discard_store(store)
+    assert cache.nbytes == 0
+    cache.get(store, 'image/0')
+    assert store.reads == ['image/0', 'image/1', 'image/0']
+
+
+def test_least_recently_used_is_evicted(store, monkeypatch):
+    monkeypatch.setattr(config, 'chunk_cache_max_bytes', 150)
+    cache = ChunkCache()
+    cache.get(store, 'image/0')
+    cache.get(store, 'image/1')
+    assert cache.nbytes == 100
+    cache.get(store, 'image/1')
+    cache.get(store, 'image/0')
+    assert store.reads == ['image/0', 'image/1', 'image/0']
+
+
+def test_in_memory_stores_are_not_cached():
+    cache = ChunkCache()
+    store = zarr.storage.MemoryStore()
+    store['image/0'] = bytes(100)
+    cache.get(store, 'image/0')
+    assert cache.nbytes == 0
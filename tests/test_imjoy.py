@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+import zarr
+
+from itkwidgets import imjoy
+from itkwidgets.config import config
+from itkwidgets.integrations.environment import Env
+
+
+class CountingStore(zarr.storage.MemoryStore):
+    """Counts the items that are read."""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = []
+
+    def __getitem__(self, key):
+        self.reads.append(key)
+        return super().__getitem__(key)
+
+
+@pytest.fixture
+def store():
+    store = CountingStore()
+    for index in range(8):
+        store[f'scale0/image/{index}'] = bytes(100)
+    return store
+
+
+@pytest.fixture
+def keys():
+    return [f'scale0/image/{index}' for index in range(8)]
+
+
+def test_get_items(store, keys):
+    get_items = imjoy.encode_zarr_store(store)['getItems']
+    items = asyncio.run(get_items(keys[:3] + ['scale0/image/missing']))
+    assert items == {
+        **{key: bytes(100) for key in keys[:3]},
+        'scale0/image/missing': None,
+    }
+
+
+def test_get_items_byte_cap(store, keys, monkeypatch):
+    monkeypatch.setattr(config, 'rpc_batch_max_bytes', 250)
+    monkeypatch.setattr(config, 'rpc_max_workers', 1)
+    get_items = imjoy.encode_zarr_store(store)['getItems']
+    items = asyncio.run(get_items(keys))
+    # The remaining keys are requested again by the viewer
+    assert list(items) == keys[:2]
+    # Reading stops once the cap is reached
+    assert store.reads == keys[:3]
+
+
+def test_get_items_byte_cap_returns_one_chunk(store, keys, monkeypatch):
+    monkeypatch.setattr(config, 'rpc_batch_max_bytes', 10)
+    get_items = imjoy.encode_zarr_store(store)['getItems']
+    assert list(asyncio.run(get_items(keys))) == keys[:1]
+
+
+def test_get_items_byte_cap_without_threads(store, keys, monkeypatch):
+    monkeypatch.setattr(imjoy, 'ENVIRONMENT', Env.JUPYTERLITE)
+    monkeypatch.setattr(config, 'rpc_batch_max_bytes', 250)
+    get_items = imjoy.encode_zarr_store(store)['getItems']
+    assert list(get_items(keys)) == keys[:2]
+    assert store.reads == keys[:3]
+
+
+def test_store_executor_follows_config(monkeypatch):
+    monkeypatch.setattr(config, 'rpc_max_workers', 2)
+    executor = imjoy._store_executor()
+    assert imjoy._store_executor() is executor
+    monkeypatch.setattr(config, 'rpc_max_workers', 3)
+    assert imjoy._store_executor() is not executor
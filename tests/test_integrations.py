@@ -0,0 +1,22 @@
+import dask.array as da
+import numpy as np
+import pytest
+
+from itkwidgets.integrations import _xarray_to_store
+
+xr = pytest.importorskip('xarray')
+
+
+def test_xarray_data_set_with_inconsistent_chunks():
+    data_set = xr.Dataset({
+        'image': (('y', 'x'), da.zeros((32, 32), chunks=16)),
+        'other': (('y', 'x'), da.zeros((32, 32), chunks=8)),
+    })
+    store = _xarray_to_store(data_set, None)
+    assert store.lazy_source
+
+
+def test_xarray_data_array_in_memory():
+    data_array = xr.DataArray(np.zeros((32, 32)), dims=('y', 'x'))
+    store = _xarray_to_store(data_array, None)
+    assert not store.lazy_source
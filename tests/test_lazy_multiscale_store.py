@@ -0,0 +1,54 @@
+import dask.array as da
+import numpy as np
+import pytest
+import zarr
+from ngff_zarr import Methods, to_multiscales, to_ngff_image, to_ngff_zarr
+
+from itkwidgets._pyramid_planner import plan_scale_factors
+from itkwidgets.integrations import _ngff_image_to_store
+
+
+@pytest.fixture(scope='module')
+def array():
+    # Large enough for two levels after the first
+    return np.random.default_rng(0).random((1100, 900)).astype(np.float32)
+
+
+def _datasets(group):
+    return group.attrs['multiscales'][0]['datasets']
+
+
+@pytest.mark.parametrize('method', [Methods.ITKWASM_GAUSSIAN, Methods.ITKWASM_BIN_SHRINK])
+@pytest.mark.parametrize('lazy_source', [False, True])
+def test_matches_to_ngff_zarr(array, method, lazy_source):
+    data = da.from_array(array, chunks=128) if lazy_source else array
+    store = _ngff_image_to_store(
+        to_ngff_image(data), method, cache=False, lazy_source=lazy_source
+    )
+
+    image = to_ngff_image(data)
+    scale_factors = plan_scale_factors(image.dims, image.data.shape, image.scale)
+    expected_store = zarr.storage.MemoryStore(dimension_separator='/')
+    to_ngff_zarr(expected_store, to_multiscales(image, scale_factors=scale_factors, method=method))
+
+    group = zarr.open_group(store, mode='r')
+    expected = zarr.open_group(expected_store, mode='r')
+    assert len(_datasets(group)) == 3
+    for dataset, expected_dataset in zip(_datasets(group), _datasets(expected)):
+        assert dataset['coordinateTransformations'] == expected_dataset['coordinateTransformations']
+        np.testing.assert_array_equal(
+            group[dataset['path']][...], expected[expected_dataset['path']][...]
+        )
+
+
+def test_chunks_are_computed_on_request(array):
+    store = _ngff_image_to_store(to_ngff_image(array), Methods.ITKWASM_GAUSSIAN, cache=False)
+    assert not any(store.progress().values())
+    datasets = _datasets(zarr.open_group(store, mode='r'))
+    finest, coarsest = datasets[0]['path'], datasets[-1]['path']
+    store[f'{coarsest}/0/0']
+    progress = store.progress()
+    assert 0 < progress[coarsest] < 1
+    # Finer levels are derived from the source, not from the full resolution
+    # chunks that were not requested
+    assert progress[finest] == 0
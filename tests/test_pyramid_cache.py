@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from ngff_zarr import Methods, to_ngff_image
+
+from itkwidgets._pyramid_cache import pyramid_cache
+from itkwidgets.config import config
+from itkwidgets.integrations import _ngff_image_to_store
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    pyramid_cache.clear()
+    yield
+    pyramid_cache.clear()
+
+
+@pytest.fixture
+def array():
+    return np.random.default_rng(0).random((64, 64)).astype(np.float32)
+
+
+def _store(array, method=Methods.ITKWASM_GAUSSIAN):
+    # A new image each time, as to_multiscales rechunks the image it is given
+    return _ngff_image_to_store(to_ngff_image(array), method)
+
+
+def test_same_image_is_a_hit(array):
+    store = _store(array)
+    assert _store(array.copy()) is store
+
+
+def test_changed_pixels_are_a_miss(array):
+    store = _store(array)
+    array[0, 0] += 1
+    assert _store(array) is not store
+
+
+def test_changed_method_is_a_miss(array):
+    store = _store(array)
+    assert _store(array, Methods.ITKWASM_BIN_SHRINK) is not store
+
+
+def test_least_recently_used_is_evicted(array, monkeypatch):
+    first = _store(array)
+    # Room for a single pyramid
+    monkeypatch.setattr(config, 'pyramid_cache_max_bytes', int(pyramid_cache.nbytes * 1.5))
+    second = _store(array + 1)
+    assert _store(array + 1) is second
+    assert _store(array) is not first
+
+
+def test_disabled(array, monkeypatch):
+    monkeypatch.setattr(config, 'pyramid_cache_max_bytes', 0)
+    assert _store(array) is not _store(array)
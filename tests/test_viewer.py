@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+
+def test_get_state(viewer, viewer_api):
+    state = asyncio.run(viewer.get_state())
+    assert state['cmap'] == 'jet'
+    assert 'z_slice' in state
+    # Without a label image, its parameters are not requested
+    assert 'label_blend' not in state
+    assert not any(method.startswith('getLabelImage') for method, _ in viewer_api.calls)
+
+
+def test_get_state_with_label_image(viewer):
+    viewer.stores['LabelImage'] = object()
+    state = asyncio.run(viewer.get_state())
+    assert 'label_blend' in state
+
+
+def test_set_state(viewer, viewer_api):
+    viewer.set_state({'cmap': 'viridis', 'z_slice': 42})
+    assert viewer_api.calls == [
+        ('setImageColorMap', ('viridis',)),
+        ('setZSlice', (42,)),
+    ]
+
+
+def test_set_state_unsupported(viewer, viewer_api):
+    with pytest.raises(ValueError):
+        viewer.set_state({'cmap': 'viridis', 'colour': 'red'})
+    assert viewer_api.calls == []
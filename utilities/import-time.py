@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""Measure the cold import time of itkwidgets.
+
+Each sample imports the module in a fresh interpreter with `-X importtime`.
+The median cumulative time is reported along with the slowest imports. Pass
+--budget to exit with an error when the median exceeds a budget, e.g. in CI.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+def sample(module):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='itkwidgets', help='Module to import. default: itkwidgets')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of samples. default: 5')
+    parser.add_argument('--top', type=int, default=15, help='Number of slowest imports to list. default: 15')
+    parser.add_argument('--budget', type=float, default=None, help='Fail if the median import time exceeds this many seconds.')
+    args = parser.parse_args()
+
+    samples = [sample(args.module) for _ in range(args.repeat)]
+    totals = [s[args.module] / 1e6 for s in samples]
+    median = statistics.median(totals)
+
+    print(f'import {args.module}: median {median:.3f} s, min {min(totals):.3f} s, max {max(totals):.3f} s over {args.repeat} runs')
+    print()
+    print('Slowest imports, cumulative, of the last run:')
+    slowest = sorted(samples[-1].items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative_us in slowest[:args.top]:
+        print(f'  {cumulative_us / 1e3:9.1f} ms  {name}')
+
+    if args.budget is not None and median > args.budget:
+        print(f'\nImport time {median:.3f} s exceeds the budget of {args.budget:.3f} s')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()